@@ -1,5 +1,11 @@
+import sys
+import numpy as np
 import pandas as pd
 from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent / "vn_fs"))
+from sheet_cache import read_raw_sheet
+from statement_extract import extract_features
+from ratios import evaluate
 
 # === Đường dẫn tới folder chứa file gốc ===
 base_dir = Path("data/landing/HOSE/VNM/2023")
@@ -13,7 +19,7 @@ files = {
 
 # === Hàm load và clean file gốc ===
 def load_clean(path):
-    df = pd.read_excel(path, engine="openpyxl", header=None)
+    df = read_raw_sheet(path)
     df = df.iloc[5:, :]                       # bỏ 5 dòng đầu meta
     df = df.rename(columns={0: "chi_tieu"})   # cột đầu là chi_tieu
     df = df.dropna(how="all")                 # bỏ dòng NaN
@@ -34,72 +40,51 @@ for key, fname in files.items():
 
 cdkt, kqkd, lctt = cleaned["cdkt"], cleaned["kqkd"], cleaned["lctt"]
 
-# === Hàm lấy giá trị theo tên chỉ tiêu (lấy cột cuối cùng) ===
-def get_value(df, keyword):
-    row = df[df["chi_tieu"].astype(str).str.contains(keyword, case=False, na=False)]
-    if row.shape[0] == 0:
-        return None
-    val = row.iloc[0, -1]
-    try:
-        val = float(str(val).replace(",", "").replace(" ", ""))
-    except:
-        val = None
-    return val
-
-# === Trích xuất chỉ tiêu quan trọng ===
-features = {
-    "company_id": "VNM",
-    "year": 2023,
-
+# === Chỉ tiêu quan trọng: (sheet, keyword), lấy cột cuối cùng ===
+VNM_KEYWORDS = {
     # Balance sheet
-    "total_assets": get_value(cdkt, "TỔNG CỘNG TÀI SẢN"),
-    "equity": get_value(cdkt, "Vốn chủ sở hữu"),
-    "total_liabilities": get_value(cdkt, "Nợ phải trả"),
-    "current_assets": get_value(cdkt, "Tài sản ngắn hạn"),
-    "current_liabilities": get_value(cdkt, "Nợ ngắn hạn"),
-    "cash_and_equivalents": get_value(cdkt, "Tiền và các khoản tương đương tiền"),
-    "short_term_debt": get_value(cdkt, "Vay và nợ thuê tài chính ngắn hạn"),
-    "long_term_debt": get_value(cdkt, "Vay và nợ thuê tài chính dài hạn"),
+    "total_assets": ("cdkt", ["TỔNG CỘNG TÀI SẢN"]),
+    "equity": ("cdkt", ["Vốn chủ sở hữu"]),
+    "total_liabilities": ("cdkt", ["Nợ phải trả"]),
+    "current_assets": ("cdkt", ["Tài sản ngắn hạn"]),
+    "current_liabilities": ("cdkt", ["Nợ ngắn hạn"]),
+    "cash_and_equivalents": ("cdkt", ["Tiền và các khoản tương đương tiền"]),
+    "short_term_debt": ("cdkt", ["Vay và nợ thuê tài chính ngắn hạn"]),
+    "long_term_debt": ("cdkt", ["Vay và nợ thuê tài chính dài hạn"]),
 
     # Income statement
-    "revenue": get_value(kqkd, "Doanh thu thuần"),
-    "gross_profit": get_value(kqkd, "Lợi nhuận gộp"),
-    "net_income": get_value(kqkd, "Lợi nhuận sau thuế"),
-    "selling_expenses": get_value(kqkd, "Chi phí bán hàng"),
-    "admin_expenses": get_value(kqkd, "Chi phí quản lý"),
-    "interest_expenses": get_value(kqkd, "Chi phí lãi vay"),
+    "revenue": ("kqkd", ["Doanh thu thuần"]),
+    "gross_profit": ("kqkd", ["Lợi nhuận gộp"]),
+    "net_income": ("kqkd", ["Lợi nhuận sau thuế"]),
+    "selling_expenses": ("kqkd", ["Chi phí bán hàng"]),
+    "admin_expenses": ("kqkd", ["Chi phí quản lý"]),
+    "interest_expenses": ("kqkd", ["Chi phí lãi vay"]),
 
     # Cash flow
-    "cashflow_ops": get_value(lctt, "Lưu chuyển tiền thuần từ hoạt động kinh doanh"),
-    "cashflow_investing": get_value(lctt, "Lưu chuyển tiền thuần từ hoạt động đầu tư"),
-    "cashflow_financing": get_value(lctt, "Lưu chuyển tiền thuần từ hoạt động tài chính"),
+    "cashflow_ops": ("lctt", ["Lưu chuyển tiền thuần từ hoạt động kinh doanh"]),
+    "cashflow_investing": ("lctt", ["Lưu chuyển tiền thuần từ hoạt động đầu tư"]),
+    "cashflow_financing": ("lctt", ["Lưu chuyển tiền thuần từ hoạt động tài chính"]),
 }
 
-# === Tính thêm ratios ===
-try:
-    features["ROA"] = features["net_income"] / features["total_assets"]
-except: features["ROA"] = None
-
-try:
-    features["ROE"] = features["net_income"] / features["equity"]
-except: features["ROE"] = None
-
-try:
-    features["Debt_to_Equity"] = features["total_liabilities"] / features["equity"]
-except: features["Debt_to_Equity"] = None
-
-try:
-    features["Current_Ratio"] = features["current_assets"] / features["current_liabilities"]
-except: features["Current_Ratio"] = None
-
-try:
-    features["Net_Profit_Margin"] = features["net_income"] / features["revenue"]
-except: features["Net_Profit_Margin"] = None
-
-try:
-    EBIT = (features["gross_profit"] or 0) - (features["selling_expenses"] or 0) - (features["admin_expenses"] or 0)
-    features["Interest_Coverage"] = EBIT / features["interest_expenses"] if features["interest_expenses"] else None
-except: features["Interest_Coverage"] = None
+# === Trích xuất chỉ tiêu quan trọng ===
+values = extract_features(cleaned, spec=VNM_KEYWORDS).iloc[0].drop("year")
+# không tìm thấy -> None như trước, để các phép tính ratio bên dưới giữ nguyên hành vi
+features = {"company_id": "VNM", "year": 2023, **{k: None if pd.isna(v) else float(v) for k, v in values.items()}}
+
+# === Tính thêm ratios (registry dùng chung với silver, chia "strict": mẫu 0/thiếu -> None) ===
+VNM_RATIOS = {
+    "ROA": "roa",
+    "ROE": "roe",
+    "Debt_to_Equity": "liabilities_to_equity",
+    "Current_Ratio": "current_ratio",
+    "Net_Profit_Margin": "net_margin",
+    "Interest_Coverage": "ebit_coverage",   # EBIT = LN gộp - CP bán hàng - CP quản lý
+}
+inputs = {**features, "net_profit": features["net_income"], "interest_expense": features["interest_expenses"]}
+ratios = evaluate(inputs, VNM_RATIOS.values(), policy="strict")
+for col, name in VNM_RATIOS.items():
+    v = float(ratios[name][0])
+    features[col] = None if np.isnan(v) else v
 
 # === Xuất summary cuối ===
 df_out = pd.DataFrame([features])
@@ -1,5 +1,8 @@
+import sys
 import pandas as pd
 from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent / "vn_fs"))
+from sheet_cache import read_raw_sheet
 
 # === Đường dẫn ===
 base_dir = Path("data/landing/HOSE/VNM/2023")
@@ -11,7 +14,7 @@ files = {
 
 def load_clean(path):
     # Đọc toàn bộ, bỏ header phụ
-    df = pd.read_excel(path, engine="openpyxl", header=None)
+    df = read_raw_sheet(path)
     df = df.iloc[5:, :]                       # bỏ 5 dòng đầu meta
     df = df.rename(columns={0: "chi_tieu"})   # cột đầu là "chi_tieu"
     df = df.dropna(how="all")                 # bỏ dòng toàn NaN
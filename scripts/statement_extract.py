@@ -0,0 +1,133 @@
+import re
+import unicodedata
+from bisect import bisect_right
+import numpy as np
+import pandas as pd
+
+# ==== Trích chỉ tiêu: index nhãn 1 lần / sheet, lấy mọi năm trong 1 lần gather ====
+# Cột nhãn (cột đầu) của mỗi sheet được chuẩn hoá (NFC, chữ thường, gộp khoảng
+# trắng) và nối thành một chuỗi; mỗi keyword chỉ là một lần str.find trên chuỗi
+# đó thay vì str.contains trên cả cột. Giữ đúng luật của get_value cũ: keyword
+# đầu tiên có dòng khớp thắng, lấy dòng khớp đầu tiên, giá trị không đọc được
+# số thì để NaN (không thử keyword sau).
+
+CASHFLOW = "Lưu chuyển tiền thuần từ hoạt động"
+
+# tên cột -> (sheet, keyword theo thứ tự ưu tiên)
+FEATURE_KEYWORDS = {
+    # Balance Sheet
+    "total_assets": ("cdkt", ["Tổng cộng tài sản"]),
+    "equity": ("cdkt", ["Vốn chủ sở hữu"]),
+    "total_liabilities": ("cdkt", ["Nợ phải trả"]),
+    "current_assets": ("cdkt", ["Tài sản ngắn hạn"]),
+    "current_liabilities": ("cdkt", ["Nợ ngắn hạn"]),
+    "cash_and_equivalents": ("cdkt", ["Tiền và các khoản tương đương tiền"]),
+    "short_term_debt": ("cdkt", ["Vay và nợ thuê tài chính ngắn hạn"]),
+    "long_term_debt": ("cdkt", ["Vay và nợ thuê tài chính dài hạn"]),
+    # Income Statement
+    "revenue": ("kqkd", ["Doanh thu bán hàng", "Doanh thu thuần"]),
+    "gross_profit": ("kqkd", ["Lợi nhuận gộp"]),
+    "net_income": ("kqkd", ["Lợi nhuận sau thuế", "Lợi nhuận sau thuế thu nhập DN"]),
+    "selling_expenses": ("kqkd", ["Chi phí bán hàng"]),
+    "admin_expenses": ("kqkd", ["Chi phí quản lý doanh nghiệp"]),
+    "interest_expenses": ("kqkd", ["Chi phí tài chính"]),
+    # Cash Flow – có fallback để không bị NaN
+    "cashflow_ops": ("lctt", [f"{CASHFLOW} kinh doanh", "I. Lưu chuyển tiền từ hoạt động kinh doanh",
+                              "hoạt động kinh doanh"]),
+    "cashflow_investing": ("lctt", [f"{CASHFLOW} đầu tư", "II. Lưu chuyển tiền từ hoạt động đầu tư",
+                                    "hoạt động đầu tư"]),
+    "cashflow_financing": ("lctt", [f"{CASHFLOW} tài chính", "III. Lưu chuyển tiền từ hoạt động tài chính",
+                                    "hoạt động tài chính"]),
+}
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_label(text) -> str:
+    if not isinstance(text, str):
+        text = "" if pd.isna(text) else str(text)
+    return _WS.sub(" ", unicodedata.normalize("NFC", text).casefold()).strip()
+
+
+class LabelIndex:
+    """Cột nhãn của một sheet, chuẩn hoá một lần cho mọi lần tìm keyword."""
+
+    def __init__(self, labels):
+        labels = [normalize_label(x) for x in labels]
+        self._blob = "\n".join(labels)
+        self._starts = np.cumsum([0] + [len(x) + 1 for x in labels[:-1]]).tolist() if labels else []
+        self._hits = {}
+
+    @classmethod
+    def from_frame(cls, df, label_col=0):
+        return cls(df.iloc[:, label_col].tolist())
+
+    def find(self, keywords):
+        """Vị trí dòng khớp cho keyword đầu tiên có kết quả, None nếu không có."""
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        for kw in keywords:
+            kw = normalize_label(kw)
+            if kw not in self._hits:
+                pos = self._blob.find(kw) if kw else -1
+                self._hits[kw] = None if pos < 0 else bisect_right(self._starts, pos) - 1
+            if self._hits[kw] is not None:
+                return self._hits[kw]
+        return None
+
+
+def to_number(values) -> np.ndarray:
+    """Như float(str(v).replace(",", "").replace(" ", "")), lỗi -> NaN."""
+    s = pd.Series(np.asarray(values, dtype=object).ravel()).astype(str)
+    s = s.str.replace(",", "", regex=False).str.replace(" ", "", regex=False)
+    return pd.to_numeric(s, errors="coerce").to_numpy(dtype=float).reshape(np.shape(values))
+
+
+def year_columns(df, years) -> dict:
+    """year -> vị trí cột đầu tiên có tên chứa năm đó (vd "Năm/2023")."""
+    names = [str(c) for c in df.columns]
+    out = {}
+    for y in years:
+        pos = next((i for i, c in enumerate(names) if str(y) in c), None)
+        if pos is not None:
+            out[y] = pos
+    return out
+
+
+def extract_features(sheets: dict, years=None, spec=FEATURE_KEYWORDS, label_col=0) -> pd.DataFrame:
+    """Một dòng / kỳ, một cột / chỉ tiêu trong `spec`.
+
+    sheets: {"cdkt": df, "kqkd": df, "lctt": df}. years=None lấy cột cuối của
+    mỗi sheet (một kỳ, year=None); ngược lại mỗi năm lấy cột có tên chứa năm đó,
+    năm không có trong sheet cân đối thì bị bỏ qua.
+    """
+    by_sheet = {}
+    for name, (sheet, keywords) in spec.items():
+        by_sheet.setdefault(sheet, []).append((name, keywords))
+
+    if years is None:
+        periods = [None]
+        cols = {s: {None: sheets[s].shape[1] - 1} for s in by_sheet}
+    else:
+        cols = {s: year_columns(sheets[s], years) for s in by_sheet}
+        ref = cols.get("cdkt", next(iter(cols.values()), {}))
+        periods = [y for y in years if y in ref]
+
+    out = {"year": periods}
+    for sheet, items in by_sheet.items():
+        df = sheets[sheet]
+        index = LabelIndex.from_frame(df, label_col)
+        rows = [index.find(kw) for _, kw in items]
+        pcols = [cols[sheet].get(p) for p in periods]
+        found_r = [r for r in rows if r is not None]
+        found_c = [c for c in pcols if c is not None]
+        values = np.full((len(items), len(periods)), np.nan)
+        if found_r and found_c:
+            # một lần take cho mọi (chỉ tiêu, năm) của sheet
+            block = to_number(df.to_numpy(dtype=object)[np.ix_(found_r, found_c)])
+            ri = [i for i, r in enumerate(rows) if r is not None]
+            ci = [j for j, c in enumerate(pcols) if c is not None]
+            values[np.ix_(ri, ci)] = block
+        for (name, _), v in zip(items, values):
+            out[name] = v
+    return pd.DataFrame(out)[["year", *spec]]
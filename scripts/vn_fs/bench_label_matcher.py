@@ -0,0 +1,37 @@
+import random
+import timeit
+from bronze_extract import KEY_MAP, LabelMatcher, map_row_to_standard
+
+# Microbenchmark: LabelMatcher vs map_row_to_standard on repeated statement labels
+
+NOISE = [
+    "Tiền và các khoản tương đương tiền", "Các khoản phải thu ngắn hạn", "Hàng tồn kho",
+    "Tài sản cố định hữu hình", "Thuế thu nhập doanh nghiệp hiện hành", "Lãi cơ bản trên cổ phiếu",
+    "Doanh thu hoạt động tài chính", "Chi phí tài chính", "Lợi nhuận gộp về bán hàng",
+    "Phải trả người bán ngắn hạn", "Vốn góp của chủ sở hữu", "Lợi ích cổ đông không kiểm soát",
+    "Khấu hao TSCĐ", "Tiền chi trả lãi vay", "Nan", "", "Mã số", "Thuyết minh",
+]
+
+def make_labels(n_rows: int, seed: int = 42):
+    rng = random.Random(seed)
+    known = [k.upper() if rng.random() < 0.3 else k.capitalize() for keys in KEY_MAP.values() for k in keys]
+    pool = known + NOISE
+    return [f"{rng.randint(1, 30)}. {rng.choice(pool)}" if rng.random() < 0.5 else rng.choice(pool)
+            for _ in range(n_rows)]
+
+def run(n_rows: int = 20000, repeat: int = 5):
+    labels = make_labels(n_rows)
+    matcher = LabelMatcher(KEY_MAP)
+    assert [map_row_to_standard(l) for l in labels] == [matcher(l) for l in labels]
+
+    t_old = min(timeit.repeat(lambda: [map_row_to_standard(l) for l in labels], number=1, repeat=repeat))
+    t_cold = min(timeit.repeat(lambda: [matcher._match(l) for l in labels], number=1, repeat=repeat))
+    t_warm = min(timeit.repeat(lambda: [matcher(l) for l in labels], number=1, repeat=repeat))
+
+    print(f"rows={n_rows}")
+    print(f"map_row_to_standard      : {t_old * 1e3:8.2f} ms")
+    print(f"LabelMatcher (no memo)   : {t_cold * 1e3:8.2f} ms  x{t_old / t_cold:.1f}")
+    print(f"LabelMatcher (memoized)  : {t_warm * 1e3:8.2f} ms  x{t_old / t_warm:.1f}")
+
+if __name__ == "__main__":
+    run()
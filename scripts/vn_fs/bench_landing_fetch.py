@@ -0,0 +1,244 @@
+import time
+import shutil
+import tempfile
+import filecmp
+import argparse
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote
+from synth_landing import generate_landing
+from landing_index import build_landing_index
+from landing_fetch import fetch_landing, part_path
+from bronze_extract import collect_from_company_quarter
+
+# ==== Landing downloader self-test against a local stand-in server ====
+# Serves a synthetic landing tree over HTTP/1.1 (keep-alive, ETag /
+# Last-Modified, conditional GET, Range + If-Range, per-request latency) and
+# drives landing_fetch through: a cold download with connections cut
+# mid-body, an all-304 re-run, changed filings, a resume across runs and a
+# bronze read of the result. One year past the fixture is requested too, so
+# every run also sees 404s. Prints timings per run and exits 1 on a failed check.
+# A second URL scheme under /old/ answers 301 to test redirects.
+# The trees live in a temporary directory (removed afterwards) unless --work is given.
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True      # headers and body go out as separate writes
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _head(self, status: int, headers: dict):
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+
+    def do_GET(self):
+        srv = self.server
+        with srv.lock:
+            srv.inflight += 1
+            srv.max_inflight = max(srv.max_inflight, srv.inflight)
+            srv.starts.append(time.monotonic())
+        try:
+            time.sleep(srv.latency)
+            self._serve(srv)
+        finally:
+            with srv.lock:
+                srv.inflight -= 1
+
+    def _serve(self, srv):
+        if self.path.startswith(MOVED_PREFIX):
+            # old URL scheme: permanent redirect to the current location
+            srv.count(301)
+            self._head(301, {"Location": self.path[len(MOVED_PREFIX) - 1:], "Content-Length": 0})
+            return
+        path = srv.root / unquote(self.path.lstrip("/"))
+        if not path.is_file():
+            body = b"not found"
+            srv.count(404)
+            self._head(404, {"Content-Length": len(body)})
+            self.wfile.write(body)
+            return
+        st = path.stat()
+        etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+        last_modified = formatdate(st.st_mtime, usegmt=True)
+        validators = {"ETag": etag, "Last-Modified": last_modified, "Accept-Ranges": "bytes"}
+        inm, ims = self.headers.get("If-None-Match"), self.headers.get("If-Modified-Since")
+        # If-None-Match wins over If-Modified-Since (RFC 9110)
+        if inm == etag or (inm is None and ims and parsedate_to_datetime(ims).timestamp() >= int(st.st_mtime)):
+            srv.count(304)
+            self._head(304, validators)
+            return
+        data = path.read_bytes()
+        start, status = 0, 200
+        rng, if_range = self.headers.get("Range"), self.headers.get("If-Range")
+        if rng and if_range in (None, etag, last_modified):
+            start = int(rng.split("=", 1)[1].split("-", 1)[0])
+            if start >= len(data):
+                srv.count(416)
+                self._head(416, {"Content-Range": f"bytes */{len(data)}", "Content-Length": 0})
+                return
+            status = 206
+            validators["Content-Range"] = f"bytes {start}-{len(data) - 1}/{len(data)}"
+        srv.count(status)
+        body = data[start:]
+        self._head(status, {**validators, "Content-Length": len(body)})
+        if self.path in srv.drop:
+            # cut the connection halfway through the body, once
+            srv.drop.discard(self.path)
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, root: Path, latency: float = 0.0):
+        super().__init__(("127.0.0.1", 0), FixtureHandler)
+        self.root, self.latency = Path(root), latency
+        self.lock = threading.Lock()
+        self.drop = set()
+        self.reset()
+
+    def reset(self):
+        self.connections, self.inflight, self.max_inflight = 0, 0, 0
+        self.starts, self.statuses = [], {}
+
+    def count(self, status: int):
+        with self.lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def url_template(self, prefix: str = "/") -> str:
+        return f"http://127.0.0.1:{self.server_port}{prefix}{{exchange}}/{{symbol}}/{{year}}/{{quarter}}_{{stmt}}.xlsx"
+
+MOVED_PREFIX = "/old/"
+FAILED = []
+
+def check(ok: bool, message: str):
+    print(f"[{'OK' if ok else 'ERROR'}] {message}")
+    if not ok:
+        FAILED.append(message)
+
+def same_tree(src: Path, out: Path) -> bool:
+    src_index, out_index = build_landing_index(src), build_landing_index(out)
+    if src_index.keys() != out_index.keys():
+        return False
+    return all(filecmp.cmp(f, out_index[k][t], shallow=False) for k, files in src_index.items()
+               for t, f in files.items())
+
+def rewrite(path: Path, other: Path):
+    """Replace a fixture filing with different content (another company's file)."""
+    path.write_bytes(other.read_bytes())
+
+def run(work: str = None, companies: int = 10, years=(2023, 2024), concurrency: int = 8, rate: float = 200.0,
+        latency: float = 0.02, baseline: bool = True):
+    keep = work is not None
+    work = Path(work) if keep else Path(tempfile.mkdtemp(prefix="landing_fetch_"))
+    shutil.rmtree(work, ignore_errors=True)
+    generate_landing(work / "src", companies, list(years), workbooks=False)
+    src = work / "src" / "data" / "landing"
+    comp_csv = str(work / "src" / "company_list.csv")
+    fetch_years = list(years) + [max(years) + 1]        # the extra year is all 404
+    server = FixtureServer(src, latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    rows = []
+
+    def fetch(name, out, prefix="/", **kw):
+        server.reset()
+        t0 = time.perf_counter()
+        stats = fetch_landing(server.url_template(prefix), fetch_years, comp_csv, str(out),
+                              **{"concurrency": concurrency, "rate": rate, "retries": 2, "backoff": 0.05, **kw})
+        elapsed = time.perf_counter() - t0
+        rows.append({"run": name, "seconds": round(elapsed, 2), "requests": len(server.starts),
+                     "connections": server.connections, "max_inflight": server.max_inflight,
+                     **{k: stats[k] for k in ("downloaded", "resumed", "not_modified", "missing", "failed")}})
+        return stats
+
+    try:
+        out = work / "landing"
+        files = sorted(p for p in src.rglob("Q*_*.xlsx"))
+        n_files, n_missing = len(files), companies * 4 * 3
+
+        if baseline:
+            fetch("cold, 1 connection", work / "landing_c1", concurrency=1, rate=0)
+
+        server.drop = {"/" + p.relative_to(src).as_posix() for p in files[:3]}
+        stats = fetch("cold", out)
+        check(stats["downloaded"] + stats["resumed"] == n_files and stats["missing"] == n_missing
+              and not stats["failed"], f"cold: {n_files} files fetched, {n_missing} missing (404)")
+        check(stats["resumed"] == 3 and server.statuses.get(206) == 3,
+              "cut connections resumed with Range (3 x 206)")
+        check(same_tree(src, out), "landing tree identical to the fixture (layout + bytes)")
+        check(not list(out.rglob(".*.part")), "no .part files left")
+        check(server.max_inflight <= concurrency, f"max in-flight {server.max_inflight} <= {concurrency}")
+        check(server.connections < len(server.starts) / 2,
+              f"keep-alive: {server.connections} connections for {len(server.starts)} requests")
+        if rate:
+            span = server.starts[-1] - server.starts[0]
+            check(span >= (len(server.starts) - 1) / rate * 0.9,
+                  f"rate limit: {len(server.starts)} requests over {span:.2f}s at <= {rate:g}/s")
+
+        stats = fetch("warm (unchanged)", out)
+        check(stats["not_modified"] == n_files and stats["bytes"] == 0, "re-run: every filing answered 304, 0 bytes")
+
+        stale = part_path(out / files[1].relative_to(src))
+        stale.write_bytes(b"abandoned")
+        stats = fetch("moved URLs (301)", out, prefix=MOVED_PREFIX)
+        check(stats["not_modified"] == n_files and stats["missing"] == n_missing and not stats["failed"]
+              and server.statuses.get(301) == n_files + n_missing, "301 redirects followed, still conditional")
+        check(not stale.exists(), "304 removed a stale .part file")
+
+        rewrite(files[5], files[6])
+        rewrite(files[7], files[8])
+        stats = fetch("2 filings changed", out)
+        check(stats["downloaded"] == 2 and stats["not_modified"] == n_files - 2, "only the 2 changed filings re-downloaded")
+
+        rewrite(files[9], files[10])
+        server.drop = {"/" + files[9].relative_to(src).as_posix()}
+        stats = fetch("interrupted", out, retries=0)
+        dest = out / files[9].relative_to(src)
+        check(stats["failed"] == 1 and part_path(dest).exists(), "interrupted download keeps its .part file")
+        check(not filecmp.cmp(files[9], dest, shallow=False), "target untouched until the download completes")
+        stats = fetch("resume next run", out)
+        check(stats["resumed"] == 1 and server.statuses.get(206) == 1 and same_tree(src, out),
+              "next run resumed the .part file and the tree matches")
+
+        unit = files[0].relative_to(src).parts
+        ex, sym, year, quarter = unit[0], unit[1], int(unit[2]), unit[3].split("_")[0]
+        check(collect_from_company_quarter(src, ex, sym, year, quarter) ==
+              collect_from_company_quarter(out, ex, sym, year, quarter), "bronze reads the fetched unit")
+    finally:
+        server.shutdown()
+        server.server_close()
+        if not keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+    print()
+    header = list(rows[0])
+    print("  ".join(f"{h:>18}" if i == 0 else f"{h:>12}" for i, h in enumerate(header)))
+    for r in rows:
+        print("  ".join(f"{r[h]!s:>18}" if i == 0 else f"{r[h]!s:>12}" for i, h in enumerate(header)))
+    if FAILED:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--work", default=None, help="keep the fixture and fetched trees here (default: temp dir)")
+    ap.add_argument("--companies", type=int, default=10)
+    ap.add_argument("--years", type=int, nargs="+", default=[2023, 2024])
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rate", type=float, default=200.0, help="requests/s per host (0 = unlimited)")
+    ap.add_argument("--latency", type=float, default=0.02, help="server-side delay per request (s)")
+    ap.add_argument("--no-baseline", action="store_true", help="skip the 1-connection cold run")
+    args = ap.parse_args()
+    run(args.work, args.companies, args.years, args.concurrency, args.rate, args.latency, not args.no_baseline)
@@ -0,0 +1,143 @@
+import io
+import json
+import time
+import argparse
+import platform
+import warnings
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from synth_landing import FIXTURE_VERSION, generate_landing
+from schemas import AMOUNT_COLS, KEY_COLS
+from bronze_extract import build_bronze_table
+from silver_transform import silver_transform
+from lake import read_dataset
+from train_baseline import load_xy, train_holdout
+
+# ==== End-to-end benchmark: bronze -> silver -> train ====
+# For each size (companies x years) a synthetic landing tree is generated once
+# under --work, then every stage is timed --repeat times (best run kept).
+# One JSON line per (size, stage) is appended to --results together with the
+# git commit, so runs from different commits can be compared with --compare.
+# Bronze is checked against the generator's truth_quarterly.csv first: a
+# fixture the extractor does not read correctly fails the run.
+
+RESULTS_PATH = "../../lake/bench/pipeline_bench.jsonl"
+WORK_DIR = "../../lake/bench/work"
+DEFAULT_SIZES = ["10x2", "40x3", "100x4"]
+
+def git_rev() -> str:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True).stdout.strip()
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def _timed(fn, repeat: int):
+    best = None
+    for _ in range(repeat):
+        with redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            t0 = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def check_bronze(bronze: Path, truth_csv: Path, rtol: float = 1e-9):
+    """Raise if any bronze amount differs from the fixture's truth file (NaN == NaN)."""
+    got = read_dataset(bronze).astype({"company_id": str, "quarter": str, "year": int})
+    truth = pd.read_csv(truth_csv).astype({"company_id": str, "quarter": str, "year": int})
+    m = truth.merge(got, on=KEY_COLS, how="outer", suffixes=("", "_bronze"), indicator=True)
+    bad = {"missing rows": int((m["_merge"] != "both").sum())}
+    for c in AMOUNT_COLS:
+        a, b = m[c].to_numpy(dtype=float), m[f"{c}_bronze"].to_numpy(dtype=float)
+        bad[c] = int((~np.isclose(a, b, rtol=rtol, atol=0.0, equal_nan=True)).sum())
+    bad = {k: v for k, v in bad.items() if v}
+    if bad:
+        raise RuntimeError(f"Bronze disagrees with {truth_csv}: {bad}")
+    print(f"[OK] Bronze matches truth: rows={len(truth)}")
+
+def bench_size(size: str, work: Path, repeat: int = 1, workers: int = 1, seed: int = 0) -> list:
+    n_companies, n_years = map(int, size.lower().split("x"))
+    years = list(range(2024 - n_years + 1, 2025))
+    root = work / f"{size}-s{seed}-v{FIXTURE_VERSION}"
+    if not (root / "truth_quarterly.csv").exists():
+        with redirect_stdout(io.StringIO()):
+            generate_landing(root, n_companies, years, seed=seed, workbooks=False)
+    landing, comp = root / "data" / "landing", root / "company_list.csv"
+    bronze, silver = root / "lake" / "bronze", root / "lake" / "silver"
+    n_files = sum(1 for _ in landing.rglob("Q*_*.xlsx"))
+
+    stages = {
+        "bronze": lambda: build_bronze_table(str(landing), str(comp), str(bronze), workers=workers),
+        "silver": lambda: silver_transform(str(bronze), str(silver), state_path=str(root / "silver_state.parquet")),
+        "train": lambda: train_holdout(*load_xy(use_cache=False, silver_path=str(silver), sample_path="")),
+    }
+    rows = []
+    for stage, fn in stages.items():
+        seconds = _timed(fn, repeat)
+        if stage == "bronze":
+            check_bronze(bronze, root / "truth_quarterly.csv")
+        n_rows = len(read_dataset(bronze if stage == "bronze" else silver, columns=["company_id"]))
+        rows.append({"size": size, "companies": n_companies, "years": n_years, "stage": stage,
+                     "files": n_files if stage == "bronze" else None, "rows": n_rows,
+                     "seconds": round(seconds, 4), "rows_per_s": round(n_rows / seconds, 1)})
+        print(f"  {size:>8} {stage:<7} {seconds:8.3f}s  rows={n_rows:<7} {n_rows / seconds:10,.0f} rows/s")
+    return rows
+
+def run(sizes, results_path: str = RESULTS_PATH, work_dir: str = WORK_DIR, repeat: int = 1, workers: int = 1):
+    meta = {"commit": git_rev(), "run_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(), "pandas": pd.__version__, "workers": workers}
+    print(f"[BENCH] commit={meta['commit']}  sizes={sizes}  repeat={repeat}  workers={workers}")
+    rows = [r for size in sizes for r in bench_size(size, Path(work_dir), repeat, workers)]
+    Path(results_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(results_path, "a", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps({**meta, **r}) + "\n")
+    print(f"[OK] Benchmark results appended: {results_path}")
+
+def compare(results_path: str = RESULTS_PATH, base: str = None, head: str = None, threshold: float = 1.2):
+    """Seconds per (size, stage): `head` (default: last run) vs `base` (default: the run before)."""
+    res = pd.read_json(results_path, lines=True)
+    runs = res.drop_duplicates("run_at")[["run_at", "commit"]].sort_values("run_at")
+    head_run = runs[runs["commit"] == head]["run_at"].max() if head else runs["run_at"].max()
+    earlier = runs[(runs["run_at"] < head_run) & ((runs["commit"] == base) if base else True)]
+    if pd.isna(head_run) or earlier.empty:
+        print("[WARN] Nothing to compare: need a base run older than the head run.")
+        return None
+    base_run = earlier["run_at"].max()
+    key = ["size", "stage"]
+    a = res[res["run_at"] == base_run].set_index(key)["seconds"]
+    b = res[res["run_at"] == head_run].set_index(key)["seconds"]
+    table = pd.DataFrame({"base_s": a, "head_s": b}).dropna()
+    table["ratio"] = (table["head_s"] / table["base_s"]).round(3)
+    commits = runs.set_index("run_at")["commit"]
+    print(f"base={commits[base_run]} ({base_run})  head={commits[head_run]} ({head_run})")
+    print(table.to_string())
+    slow = table[table["ratio"] > threshold]
+    for (size, stage), r in slow.iterrows():
+        print(f"[WARN] Regression {size} {stage}: {r['base_s']:.3f}s -> {r['head_s']:.3f}s (x{r['ratio']})")
+    return table
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="companies x years, e.g. 10x2 100x4")
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--workers", type=int, default=1, help="bronze process pool size")
+    ap.add_argument("--results", default=RESULTS_PATH)
+    ap.add_argument("--work", default=WORK_DIR, help="where synthetic landing trees are kept between runs")
+    ap.add_argument("--compare", nargs="*", metavar="COMMIT",
+                    help="compare stored runs instead of benchmarking: [BASE [HEAD]] commits, default last two runs")
+    ap.add_argument("--threshold", type=float, default=1.2, help="flag stages slower than this ratio")
+    args = ap.parse_args()
+    if args.compare is not None:
+        compare(args.results, *args.compare[:2], threshold=args.threshold)
+    else:
+        run(args.sizes, args.results, args.work, args.repeat, args.workers)
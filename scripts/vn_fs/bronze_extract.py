@@ -1,9 +1,23 @@
 
 import re
 import os
+import json
+import time
+import hashlib
+import argparse
 import unicodedata
+from functools import lru_cache
+from contextlib import nullcontext
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from landing_index import build_landing_index, units_for_companies, save_index
+from schemas import AMOUNT_COLS, BRONZE_COLS, arrow_schema, enforce, memory_report
+from lake import (write_dataset, read_dataset, dataset_exists,
+                  upsert_partitions, export_csv)
+from run_report import RunReport, add_report_args
+from sheet_cache import read_raw_sheet
 
 # ==== Helpers ====
 
@@ -11,10 +25,12 @@ def normalize(text: str) -> str:
     if text is None: return ""
     text = text.lower()
     text = ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn')
+    # "đ" is a letter of its own, not d + a mark: fold it so "hoạt động" -> "hoat dong"
+    text = text.replace('đ', 'd')
     return re.sub(r'\s+', ' ', text).strip()
 
 def detect_scale_from_sheet(df: pd.DataFrame) -> int:
-    head_txt = " ".join([ " ".join(map(str, row)) for _, row in df.head(12).iterrows() ])
+    head_txt = " ".join(map(str, df.head(12).to_numpy(dtype=object).ravel()))
     head_norm = normalize(head_txt)
     if "trieu" in head_norm: return 1_000_000
     if "ty" in head_norm or "ti" in head_norm: return 1_000_000_000
@@ -41,6 +57,51 @@ def map_row_to_standard(label: str):
                 return std_col
     return None
 
+class _MarkTable(dict):
+    # str.translate table dropping combining marks (category Mn) and folding
+    # "đ" to "d"; each distinct code point is classified once, then served from the dict
+    def __missing__(self, code):
+        val = None if unicodedata.category(chr(code)) == 'Mn' else code
+        self[code] = val
+        return val
+
+_MARKS = _MarkTable({ord('đ'): 'd'})
+_WS = re.compile(r'\s+')
+
+def normalize_fast(text: str) -> str:
+    # same output as normalize(), without the per-character Python loop
+    if text is None: return ""
+    text = unicodedata.normalize('NFD', text.lower()).translate(_MARKS)
+    return _WS.sub(' ', text).strip()
+
+class LabelMatcher:
+    """KEY_MAP compiled once for repeated label lookups.
+
+    Same result as map_row_to_standard: the first (std_col, keyword) in
+    KEY_MAP order contained in the normalized label wins. Labels are
+    memoized, and a single alternation regex rejects non-matching labels
+    before the priority scan.
+    """
+
+    def __init__(self, key_map: dict, cache_size: int = 65536):
+        self.keys = [(std_col, k) for std_col, keys in key_map.items() for k in keys]
+        self._any = re.compile("|".join(re.escape(k) for _, k in self.keys))
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def _match(self, label: str):
+        lab = normalize_fast(label)
+        if not self._any.search(lab):
+            return None
+        for std_col, k in self.keys:
+            if k in lab:
+                return std_col
+        return None
+
+    def __call__(self, label: str):
+        return self.match(label)
+
+LABEL_MATCHER = LabelMatcher(KEY_MAP)
+
 def safe_to_number(x, scale=1):
     if pd.isna(x): return None
     s = str(x).strip()
@@ -58,35 +119,59 @@ def safe_to_number(x, scale=1):
     if neg: val = -abs(val)
     return val * scale
 
-def read_statement_excel(path: Path, year: int, quarter: str, symbol: str, stmt_type: str):
+def parse_numbers(values, scale=1) -> np.ndarray:
+    """Vectorized safe_to_number: object array of floats, None where unparseable."""
+    raw = pd.Series(values, dtype=object).reset_index(drop=True)
+    out = np.full(len(raw), None, dtype=object)
+    present = raw.notna().to_numpy()
+    if not present.any():
+        return out
+
+    idx = np.flatnonzero(present)
+    s = raw[present].map(str).str.strip()
+    # accounting negative (1,234) -> -1234
+    neg = (s.str.startswith("(") & s.str.endswith(")")).to_numpy(dtype=bool)
+    s = s.str.replace(r"[,.()]", "", regex=True)
+    strs = s.to_numpy(dtype=object)
+    ok = pd.to_numeric(s, errors="coerce").notna().to_numpy(dtype=bool)
+    vals = np.zeros(len(strs))
     try:
-        df = pd.read_excel(path, header=None)
-    except Exception as e:
-        print(f"[WARN] Cannot read {path}: {e}")
-        return {}
+        vals[ok] = strs[ok].astype(float)
+    except ValueError:
+        ok[:] = False
+    vals = np.where(neg, -np.abs(vals), vals) * scale
+    out[idx[ok]] = vals[ok].tolist()
 
-    scale = detect_scale_from_sheet(df)
+    # anything the fast path could not parse goes through the scalar rules
+    for i in idx[~ok]:
+        out[i] = safe_to_number(raw.iat[i], scale=scale)
+    return out
 
-    tmp = df.copy()
-    tmp_cols = tmp.columns.tolist()
+def pick_value_column(df: pd.DataFrame):
     value_col = None
     best_numeric = -1
-    for c in tmp_cols[1:6]:
-        numeric_count = pd.to_numeric(tmp[c], errors='coerce').notna().sum()
+    for c in df.columns[1:6]:
+        numeric_count = pd.to_numeric(df[c], errors='coerce').notna().sum()
         if numeric_count > best_numeric:
             best_numeric = numeric_count
             value_col = c
-    if value_col is None:
-        value_col = 1
+    return 1 if value_col is None else value_col
+
+def parse_statement_frame(df: pd.DataFrame, year: int, quarter: str, symbol: str):
+    scale = detect_scale_from_sheet(df)
+    value_col = pick_value_column(df)
 
     result = {}
-    for _, row in df.iterrows():
-        label = str(row[0])
-        std_col = map_row_to_standard(label)
-        if std_col:
-            val = safe_to_number(row[value_col], scale=scale)
-            if val is not None:
-                result[std_col] = val
+    if len(df):
+        # match each distinct label once, then gather values for matched rows only
+        codes, uniq = pd.factorize(df[0], use_na_sentinel=False)
+        std_cols = np.array([LABEL_MATCHER(str(u)) for u in uniq], dtype=object)[codes]
+        rows = np.flatnonzero(pd.notna(std_cols))
+        if len(rows):
+            vals = parse_numbers(df[value_col].to_numpy(dtype=object)[rows], scale=scale)
+            for std_col, val in zip(std_cols[rows], vals):
+                if val is not None:
+                    result[std_col] = val
 
     result.update({
         "company_id": symbol,
@@ -95,53 +180,277 @@ def read_statement_excel(path: Path, year: int, quarter: str, symbol: str, stmt_
     })
     return result
 
-def collect_from_company_quarter(root: Path, exchange: str, symbol: str, year: int, quarter: str):
+def read_statement_excel(path: Path, year: int, quarter: str, symbol: str, stmt_type: str,
+                         timings: list = None):
+    """`timings`, if given, gets one dict per file: sheet read (openpyxl or cache) vs. parse time."""
+    t0, cpu0 = time.perf_counter(), time.thread_time()
+    try:
+        df = read_raw_sheet(path)
+    except Exception as e:
+        print(f"[WARN] Cannot read {path}: {e}")
+        return {}
+    t1 = time.perf_counter()
+    rec = parse_statement_frame(df, year, quarter, symbol)
+    if timings is not None:
+        t2 = time.perf_counter()
+        timings.append({"path": str(path), "wall_s": t2 - t0, "cpu_s": time.thread_time() - cpu0,
+                        "read_s": t1 - t0, "parse_s": t2 - t1, "rows": len(df)})
+    return rec
+
+STMT_TYPES = ["kqkd", "cdkt", "lctt"]
+
+def find_statement_files(root: Path, exchange: str, symbol: str, year: int, quarter: str):
     base = root / exchange / symbol / str(year)
-    files = {
-        "kqkd": list(base.glob(f"{quarter}_kqkd.*")),
-        "cdkt": list(base.glob(f"{quarter}_cdkt.*")),
-        "lctt": list(base.glob(f"{quarter}_lctt.*")),
-    }
-    rec = {"company_id": symbol, "year": year, "quarter": quarter}
-
-    for stmt_type, candidates in files.items():
-        if not candidates:
+    files = {}
+    for stmt_type in STMT_TYPES:
+        candidates = list(base.glob(f"{quarter}_{stmt_type}.*"))
+        files[stmt_type] = candidates[0] if candidates else None
+    return files
+
+def collect_from_company_quarter(root: Path, exchange: str, symbol: str, year: int, quarter: str,
+                                 files: dict = None, timings: list = None):
+    if files is None:
+        files = find_statement_files(root, exchange, symbol, year, quarter)
+    rec = {"company_id": symbol, "exchange": exchange, "year": year, "quarter": quarter}
+
+    for stmt_type in STMT_TYPES:
+        f = files.get(stmt_type)
+        if f is None:
             continue
-        f = candidates[0]
         if f.suffix.lower() in [".xlsx", ".xls"]:
-            data = read_statement_excel(f, year, quarter, symbol, stmt_type)
+            data = read_statement_excel(f, year, quarter, symbol, stmt_type, timings)
             rec.update(data)
         else:
             # TODO: PDF handling later
             pass
     return rec
 
-def build_bronze_table(landing_dir: str, company_list_csv: str, out_csv: str):
+def _extract_unit(args):
+    landing, exchange, symbol, year, quarter, files = args
+    timings = []
+    try:
+        rec = collect_from_company_quarter(landing, exchange, symbol, year, quarter, files=files, timings=timings)
+        return rec, None, timings
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}", timings
+
+def extract_units(landing: Path, index: dict, units, workers: int = 1, chunksize: int = 4):
+    """Yield (unit, record, error, file_timings) per unit, in input order.
+
+    workers > 1 fans the units out to a process pool; a failing unit is
+    reported through `error` instead of aborting the run.
+    """
+    units = list(units)
+    tasks = [(landing, *u, index[u]) for u in units]
+    if workers <= 1:
+        for u, t in zip(units, tasks):
+            yield (u, *_extract_unit(t))
+        return
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        for u, res in zip(units, ex.map(_extract_unit, tasks, chunksize=chunksize)):
+            yield (u, *res)
+
+def load_landing_index(landing: Path, index_path: str = None, index: dict = None) -> dict:
+    # a prebuilt index (e.g. the pipeline's landing_index stage) skips the walk
+    if index is not None:
+        return index
+    index = build_landing_index(landing)
+    if index_path:
+        save_index(index, landing, index_path)
+    return index
+
+assert list(KEY_MAP) == AMOUNT_COLS, "KEY_MAP and schemas.AMOUNT_COLS are out of sync"
+BRONZE_SCHEMA = arrow_schema(BRONZE_COLS)
+
+def build_bronze_table(landing_dir: str, company_list_csv: str, out_dir: str, out_csv: str = None,
+                       workers: int = 1, index_path: str = None, mem_report: bool = False,
+                       report: RunReport = None, index: dict = None):
+    report = report or RunReport("bronze")
+    landing = Path(landing_dir)
+    comp = pd.read_csv(company_list_csv)
+    rows = []
+    failed = []
+    with report.stage("index") as st:
+        index = load_landing_index(landing, index_path, index)
+        st["rows"] = len(index)
+
+    with report.stage("extract") as st:
+        units = units_for_companies(index, comp)
+        for unit, rec, err, timings in extract_units(landing, index, units, workers=workers):
+            report.add_files(timings)
+            if err is not None:
+                failed.append(unit)
+                print(f"[WARN] Failed {unit[1]} {unit[2]} {unit[3]}: {err}")
+                continue
+            if any(k in rec for k in KEY_MAP):
+                rows.append(rec)
+        st.update(rows=len(rows), files=len(report.files), failed_units=len(failed), workers=workers)
+
+    with report.stage("assemble") as st:
+        raw = pd.DataFrame(rows)
+        bronze = raw.drop_duplicates(subset=["company_id","year","quarter"])
+        if len(bronze) < len(raw):
+            print(f"[WARN] Dropped {len(raw) - len(bronze)} duplicate (company_id, year, quarter) rows, kept the first")
+        bronze = enforce(bronze.sort_values(["company_id","year","quarter"]))
+        st.update(rows=len(bronze), duplicates=len(raw) - len(bronze))
+    if mem_report:
+        memory_report(bronze, "bronze")
+    with report.stage("write") as st:
+        write_dataset(bronze, out_dir, BRONZE_SCHEMA)
+        if out_csv:
+            export_csv(bronze, out_csv)
+        st["rows"] = len(bronze)
+    print(f"[OK] Bronze saved: {out_dir}  rows={len(bronze)}  failed_units={len(failed)}")
+
+# ==== Incremental build (landing manifest) ====
+
+MANIFEST_NAME = "landing_manifest.json"
+MANIFEST_VERSION = 3       # 3: "đ" folded in label matching, reparse everything
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def load_manifest(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    # older manifests lack the exchange in "unit": start over
+    return data.get("files", {}) if data.get("version") == MANIFEST_VERSION else {}
+
+def save_manifest(path: Path, files: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({"version": MANIFEST_VERSION, "files": files}, fh, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def _parse_file(args):
+    path, year, quarter, symbol, stmt_type = args
+    timings = []
+    return read_statement_excel(path, year, quarter, symbol, stmt_type, timings), timings
+
+def build_bronze_incremental(landing_dir: str, company_list_csv: str, out_dir: str, out_csv: str = None,
+                             manifest_path: str = None, workers: int = 1, index_path: str = None,
+                             mem_report: bool = False, report: RunReport = None, index: dict = None):
+    """Re-parse only landing files that were added or changed since the last run.
+
+    The manifest keeps (size, mtime, sha256) and the extracted record of every
+    landing file; a file is re-hashed only when size/mtime moved and re-parsed
+    only when its hash changed. Affected units are upserted into the bronze
+    dataset, rewriting only their (year, exchange) partitions.
+    """
+    report = report or RunReport("bronze")
     landing = Path(landing_dir)
+    manifest_path = Path(manifest_path) if manifest_path else Path(out_dir).parent / MANIFEST_NAME
     comp = pd.read_csv(company_list_csv)
+    with report.stage("index") as st:
+        index = load_landing_index(landing, index_path, index)
+        st["rows"] = len(index)
+
+    with report.stage("scan") as info:
+        old = load_manifest(manifest_path)
+        files = {}
+        unit_files = {}
+        to_parse = []
+        touched = set()
+
+        for unit in units_for_companies(index, comp):
+            exchange, symbol, y, q = unit
+            for stmt_type in STMT_TYPES:
+                f = index[unit].get(stmt_type)
+                if f is None or f.suffix.lower() not in [".xlsx", ".xls"]:
+                    continue
+                rel = f.relative_to(landing).as_posix()
+                unit_files.setdefault(unit, []).append(rel)
+                st = f.stat()
+                prev = old.get(rel)
+                if prev and prev["size"] == st.st_size and prev["mtime"] == st.st_mtime_ns:
+                    files[rel] = prev
+                    continue
+                digest = file_digest(f)
+                if prev and prev["sha256"] == digest:
+                    files[rel] = {**prev, "size": st.st_size, "mtime": st.st_mtime_ns}
+                    continue
+                files[rel] = {"size": st.st_size, "mtime": st.st_mtime_ns, "sha256": digest,
+                              "unit": [exchange, symbol, y, q], "record": None}
+                to_parse.append((rel, (f, y, q, symbol, stmt_type)))
+                touched.add(unit)
+        info.update(rows=len(files), changed_files=len(to_parse))
+
+    for rel in set(old) - set(files):
+        touched.add(tuple(old[rel]["unit"]))
+
+    with report.stage("extract") as st:
+        tasks = [t for _, t in to_parse]
+        with ProcessPoolExecutor(max_workers=workers) if workers > 1 and tasks else nullcontext() as ex:
+            parsed = ex.map(_parse_file, tasks) if ex else map(_parse_file, tasks)
+            for (rel, _), (record, timings) in zip(to_parse, parsed):
+                files[rel]["record"] = record
+                report.add_files(timings)
+        st.update(rows=len(to_parse), files=len(to_parse), workers=workers)
+
+    exists = dataset_exists(out_dir)
+    if exists and not touched:
+        save_manifest(manifest_path, files)
+        print(f"[OK] Bronze up to date: {out_dir}  files={len(files)}")
+        return
+    if not exists:
+        # no table to merge into: assemble every unit from the cache
+        touched = set(unit_files) | touched
+
     rows = []
-    years = [2022, 2023, 2024]
-    quarters = ["Q1", "Q2", "Q3", "Q4"]
-
-    for _, r in comp.iterrows():
-        symbol = r["symbol"]
-        exchange = r["exchange"]
-        for y in years:
-            for q in quarters:
-                rec = collect_from_company_quarter(landing, exchange, symbol, y, q)
-                if any(k in rec for k in ["revenue","cogs","opex","net_profit","total_assets","equity",
-                                          "short_term_debt","long_term_debt","cashflow_ops","interest_expense"]):
-                    rows.append(rec)
-
-    bronze = pd.DataFrame(rows).drop_duplicates(subset=["company_id","year","quarter"])
-    bronze = bronze.sort_values(["company_id","year","quarter"])
-    Path(os.path.dirname(out_csv)).mkdir(parents=True, exist_ok=True)
-    bronze.to_csv(out_csv, index=False)
-    print(f"[OK] Bronze saved: {out_csv}  rows={len(bronze)}")
+    for unit in sorted(touched, key=lambda u: (str(u[1]), u[2], u[3])):
+        exchange, symbol, y, q = unit
+        rec = {"company_id": symbol, "exchange": exchange, "year": y, "quarter": q}
+        for rel in unit_files.get(unit, []):
+            rec.update(files[rel]["record"] or {})
+        if any(k in rec for k in KEY_MAP):
+            rows.append(rec)
+    new_rows = enforce(pd.DataFrame(rows))
+    if mem_report:
+        memory_report(new_rows, "bronze (upserted rows)")
+
+    with report.stage("write") as st:
+        if exists:
+            keys = pd.DataFrame(sorted(touched), columns=["exchange", "company_id", "year", "quarter"])
+            partitions = upsert_partitions(out_dir, BRONZE_SCHEMA, new_rows, keys)
+        else:
+            write_dataset(new_rows, out_dir, BRONZE_SCHEMA)
+            partitions = len(new_rows[["year", "exchange"]].drop_duplicates()) if len(new_rows) else 0
+
+        save_manifest(manifest_path, files)
+        if out_csv:
+            export_csv(read_dataset(out_dir, BRONZE_SCHEMA).sort_values(["company_id","year","quarter"]), out_csv)
+        st.update(rows=len(new_rows), partitions=partitions)
+    print(f"[OK] Bronze (incremental) saved: {out_dir}  parsed_files={len(to_parse)}  "
+          f"touched_units={len(touched)}  partitions={partitions}")
 
 if __name__ == "__main__":
-    build_bronze_table(
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=1, help="process pool size (1 = serial)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="re-parse only landing files added/changed since the last run")
+    ap.add_argument("--index-path", default=None, help="also persist the landing index as JSON here")
+    ap.add_argument("--csv", action="store_true", help="also export a flat bronze CSV")
+    ap.add_argument("--mem-report", action="store_true", help="print per-column memory use")
+    add_report_args(ap, slowest=True)
+    args = ap.parse_args()
+    report = RunReport("bronze", args.report, args.profile, args.slowest)
+    build = build_bronze_incremental if args.incremental else build_bronze_table
+    build(
         landing_dir="../../data/landing",
         company_list_csv="company_list.csv",
-        out_csv="../../lake/bronze/vn_fs/bronze_financials_quarterly.csv"
+        out_dir="../../lake/bronze/vn_fs/financials_quarterly",
+        out_csv="../../lake/bronze/vn_fs/bronze_financials_quarterly.csv" if args.csv else None,
+        workers=args.workers,
+        index_path=args.index_path,
+        mem_report=args.mem_report,
+        report=report,
     )
+    if args.report:
+        report.save()
@@ -0,0 +1,189 @@
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from schemas import ID_COLS, KEY_COLS, RATIO_COLS, enforce
+from lake import read_dataset
+from ratios import RATIO_DECIMALS, evaluate
+from silver_peers import company_industry
+from run_report import RunReport, add_report_args
+
+# ==== Data-quality gate between bronze and silver ====
+# The README checklist as columnar rules over the whole bronze dataset; every
+# rule is a boolean mask over all rows (no per-company loops), so a
+# full-market multi-year bronze validates in seconds. Output is one violations
+# table (ids, rule, column, value, allowed [low, high], severity). Structural
+# problems (missing required column, duplicate key) are errors and fail the
+# stage; row-level findings are warnings.
+
+BRONZE_PATH = "../../lake/bronze/vn_fs/financials_quarterly"
+VIOLATIONS_PATH = "../../lake/bronze/vn_fs/quality_violations.parquet"
+COMPANY_LIST = "company_list.csv"
+
+REQUIRED_COLS = ["revenue", "cogs", "opex", "net_profit", "total_assets", "equity",
+                 "short_term_debt", "long_term_debt"]
+# level amounts whose scale should be stable within a company
+SCALE_COLS = ["total_assets", "equity", "revenue"]
+SCALE_JUMP_LOG10 = 2.5      # ~x300 off the company's median: triệu/tỷ (x1000) or VND/triệu mixups
+SCALE_MIN_HISTORY = 3       # quarters with a value before a company is checked
+ASSET_RANGE = (1e9, 5e15)   # VND; outside this the unit conversion is almost surely wrong
+IDENTITY_TOL = 0.01         # equity + borrowings may exceed total assets by 1% (rounding)
+
+# ratio -> (low, high); industries override individual ratios. interest_coverage
+# is left out: a zero interest expense makes it unbounded by construction.
+DEFAULT_BOUNDS = {
+    "roe": (-5.0, 5.0),
+    "roa": (-1.0, 1.0),
+    "debt_to_equity": (-50.0, 50.0),
+    "current_ratio": (0.0, 100.0),
+    "net_margin": (-10.0, 10.0),
+}
+INDUSTRY_BOUNDS = {
+    "Banking": {"roa": (-0.1, 0.1), "debt_to_equity": (-100.0, 100.0), "net_margin": (-5.0, 5.0)},
+    "Real Estate": {"net_margin": (-20.0, 20.0)},
+}
+
+VIOLATION_COLS = ID_COLS + ["rule", "column", "value", "low", "high", "severity"]
+ERROR, WARN = "error", "warn"
+
+def _pick(x, mask):
+    return np.broadcast_to(np.asarray(np.nan if x is None else x, dtype=float), mask.shape)[mask]
+
+def _violations(df: pd.DataFrame, mask, rule: str, column: str, values=None, low=None, high=None,
+                severity: str = WARN):
+    """Rows where `mask` holds; values/low/high are scalars or full-length arrays."""
+    mask = np.asarray(mask, dtype=bool)
+    out = df.loc[mask, [c for c in ID_COLS if c in df.columns]].copy()
+    out["rule"], out["column"], out["severity"] = rule, column, severity
+    out["value"], out["low"], out["high"] = _pick(values, mask), _pick(low, mask), _pick(high, mask)
+    return out
+
+def check_required(df: pd.DataFrame) -> list:
+    out = [pd.DataFrame({"rule": ["missing_column"], "column": [c], "severity": [ERROR]})
+           for c in REQUIRED_COLS if c not in df.columns]
+    present = [c for c in REQUIRED_COLS if c in df.columns]
+    isna = df[present].isna().to_numpy()
+    for j, c in enumerate(present):
+        if isna[:, j].any():
+            out.append(_violations(df, isna[:, j], "missing_required", c))
+    return out
+
+def check_unique_key(df: pd.DataFrame) -> list:
+    dup = df.duplicated(KEY_COLS, keep=False).to_numpy()
+    return [_violations(df, dup, "duplicate_key", "+".join(KEY_COLS), severity=ERROR)] if dup.any() else []
+
+def check_scale(df: pd.DataFrame) -> list:
+    out = []
+    company = df["company_id"].astype(str).to_numpy()
+    for c in [c for c in SCALE_COLS if c in df.columns]:
+        x = df[c].abs().where(df[c].abs() > 0)
+        g = x.groupby(company, sort=False)
+        # each company against its own history: robust to a minority of mis-scaled quarters
+        median, count = g.transform("median"), g.transform("count")
+        jump = np.log10(x / median)
+        mask = (jump.abs() >= SCALE_JUMP_LOG10) & (count >= SCALE_MIN_HISTORY)
+        band = 10.0 ** SCALE_JUMP_LOG10
+        out.append(_violations(df, mask, "scale_jump", c, df[c], median / band, median * band))
+    if "total_assets" in df.columns:
+        lo, hi = ASSET_RANGE
+        ta = df["total_assets"]
+        out.append(_violations(df, (ta < lo) | (ta > hi), "scale_range", "total_assets", ta, lo, hi))
+    return out
+
+def check_balance(df: pd.DataFrame) -> list:
+    out = []
+    ta = df["total_assets"] if "total_assets" in df.columns else pd.Series(np.nan, index=df.index)
+    out.append(_violations(df, ta <= 0, "assets_nonpositive", "total_assets", ta, low=0.0))
+    cols = [c for c in ("short_term_debt", "long_term_debt") if c in df.columns]
+    if "equity" in df.columns and cols:
+        # borrowings are part of liabilities: equity + debt <= total assets
+        lhs = df["equity"] + df[cols].sum(axis=1, min_count=1)
+        mask = (lhs > ta * (1 + IDENTITY_TOL)) & (ta > 0)
+        out.append(_violations(df, mask, "balance_identity", "equity+debt", lhs, high=ta * (1 + IDENTITY_TOL)))
+    if "revenue" in df.columns:
+        out.append(_violations(df, df["revenue"] < 0, "revenue_negative", "revenue", df["revenue"], low=0.0))
+    return out
+
+def industry_bounds(industry: pd.Series, col: str):
+    """Per-row (low, high) arrays for `col`: industry override, else the default."""
+    lo, hi = DEFAULT_BOUNDS[col]
+    over = {ind: b[col] for ind, b in INDUSTRY_BOUNDS.items() if col in b}
+    return (industry.map({k: v[0] for k, v in over.items()}).fillna(lo).to_numpy(dtype=float),
+            industry.map({k: v[1] for k, v in over.items()}).fillna(hi).to_numpy(dtype=float))
+
+def check_ratio_bounds(df: pd.DataFrame, industry: pd.Series) -> list:
+    cols = [c for c in RATIO_COLS if c in DEFAULT_BOUNDS]
+    ratios = evaluate(df, cols, decimals=RATIO_DECIMALS)
+    out = []
+    for c in cols:
+        lo, hi = industry_bounds(industry, c)
+        v = ratios[c]
+        mask = ~np.isnan(v) & ((v < lo) | (v > hi))
+        out.append(_violations(df, mask, "ratio_bounds", c, v, lo, hi))
+    return out
+
+def _finish(out: pd.DataFrame) -> pd.DataFrame:
+    for c in ("rule", "column", "severity"):
+        out[c] = out[c].astype("category")
+    # dataset-level rows (missing column) have no year: nullable int
+    out["year"] = pd.to_numeric(out["year"]).astype("Int16")
+    return enforce(out, [c for c in ID_COLS if c != "year"])
+
+def validate_frame(df: pd.DataFrame, comp: pd.DataFrame = None) -> pd.DataFrame:
+    df = df.reset_index(drop=True)
+    industry = company_industry(df, comp if comp is not None else pd.DataFrame())
+    parts = check_required(df) + check_unique_key(df)
+    if all(c in df.columns for c in REQUIRED_COLS):
+        parts += check_scale(df) + check_balance(df) + check_ratio_bounds(df, industry)
+    parts = [p for p in parts if len(p)]
+    if not parts:
+        empty = {c: pd.Series(dtype=float if c in ("value", "low", "high") else object) for c in VIOLATION_COLS}
+        return _finish(pd.DataFrame(empty))
+    return _finish(pd.concat(parts, ignore_index=True).reindex(columns=VIOLATION_COLS))
+
+def summarize(violations: pd.DataFrame) -> pd.DataFrame:
+    if violations.empty:
+        return pd.DataFrame(columns=["severity", "rule", "column", "rows", "companies"])
+    return (violations.groupby(["severity", "rule", "column"], observed=True)
+            .agg(rows=("rule", "size"), companies=("company_id", "nunique")).reset_index())
+
+def validate_bronze(bronze_path: str = BRONZE_PATH, company_list_csv: str = COMPANY_LIST,
+                    out_path: str = VIOLATIONS_PATH, fail_on: str = ERROR, report: RunReport = None) -> pd.DataFrame:
+    """Write the violations table; raise if any violation has severity `fail_on` (None = never)."""
+    report = report or RunReport("validate")
+    with report.stage("read_bronze") as st:
+        df = read_dataset(bronze_path)
+        comp = pd.read_csv(company_list_csv) if company_list_csv and Path(company_list_csv).exists() else None
+        st["rows"] = len(df)
+    with report.stage("validate") as st:
+        violations = validate_frame(df, comp)
+        st.update(rows=len(df), violations=len(violations))
+    if out_path:
+        Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+        violations.to_parquet(out_path, index=False)
+    summary = summarize(violations)
+    if len(summary):
+        print(summary.to_string(index=False))
+    n_err = int((violations["severity"] == ERROR).sum())
+    print(f"[OK] Bronze validated: rows={len(df)}  violations={len(violations)}  errors={n_err}  -> {out_path}")
+    if fail_on and (violations["severity"] == fail_on).any():
+        raise RuntimeError(f"Bronze failed validation: {n_err} error-level violations (see {out_path})")
+    return violations
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bronze", default=BRONZE_PATH)
+    ap.add_argument("--company-list", default=COMPANY_LIST, help="symbol -> industry for the ratio bounds")
+    ap.add_argument("--out", default=VIOLATIONS_PATH)
+    ap.add_argument("--no-fail", action="store_true", help="exit 0 even with error-level violations")
+    add_report_args(ap)
+    args = ap.parse_args()
+    report = RunReport("validate", args.report, args.profile)
+    try:
+        validate_bronze(args.bronze, args.company_list, args.out, None if args.no_fail else ERROR, report)
+    except RuntimeError as e:
+        print(f"[ERROR] {e}")
+        raise SystemExit(1)
+    finally:
+        if args.report:
+            report.save()
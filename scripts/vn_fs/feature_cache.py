@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# ==== Training matrix cache ====
+# One entry per (silver content, feature list, labeling rule, split) key:
+#   <cache_dir>/<key>/X.npy            float32, C-contiguous (n_rows, n_features)
+#   <cache_dir>/<key>/y.npy            int8 labels
+#   <cache_dir>/<key>/groups.npy       int32 company codes (names in meta.json)
+#   <cache_dir>/<key>/train_idx.npy, test_idx.npy   holdout split
+#   <cache_dir>/<key>/meta.json
+# Arrays are opened with mmap_mode="r", so a hit costs a few page-table
+# entries, not a copy. Entries are written to a temp dir and renamed into
+# place; the least recently used ones are dropped beyond max_entries/max_bytes.
+
+CACHE_DIR = "../../lake/cache/train_xy"
+MAX_ENTRIES = 8
+MAX_BYTES = 2 * 2**30
+ARRAYS = ["X", "y", "groups", "train_idx", "test_idx"]
+
+def files_digest(paths) -> str:
+    """sha256 over relative paths and contents (sorted, so order is stable)."""
+    h = hashlib.sha256()
+    for root in paths:
+        root = Path(root)
+        files = sorted(root.rglob("*.parquet")) if root.is_dir() else [root]
+        for f in files:
+            h.update(str(f.relative_to(root) if root.is_dir() else f.name).encode())
+            fd = hashlib.sha256()
+            with open(f, "rb") as fh:
+                for chunk in iter(lambda: fh.read(1 << 20), b""):
+                    fd.update(chunk)
+            h.update(fd.digest())
+    return h.hexdigest()
+
+def cache_key(source_digest: str, features, label_rule: str, **params) -> str:
+    spec = json.dumps({"source": source_digest, "features": list(features), "label_rule": label_rule,
+                       **params}, sort_keys=True, default=str)
+    return hashlib.sha256(spec.encode()).hexdigest()[:24]
+
+def load_entry(key: str, cache_dir: str = CACHE_DIR):
+    """Return (X, y, groups, (train_idx, test_idx)) memory-mapped, or None on a miss."""
+    entry = Path(cache_dir) / key
+    meta_path = entry / "meta.json"
+    if not meta_path.exists():
+        return None
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    arr = {name: np.load(entry / f"{name}.npy", mmap_mode="r") for name in ARRAYS}
+    X = pd.DataFrame(arr["X"], columns=meta["features"], copy=False)
+    y = pd.Series(arr["y"], name=meta["label"], copy=False)
+    groups = pd.Categorical.from_codes(arr["groups"], categories=meta["group_names"])
+    os.utime(meta_path)  # LRU clock
+    return X, y, groups, (arr["train_idx"], arr["test_idx"])
+
+def save_entry(key: str, X: pd.DataFrame, y, groups, split, cache_dir: str = CACHE_DIR,
+               max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES) -> Path:
+    root = Path(cache_dir)
+    entry = root / key
+    tmp = root / f".{key}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    codes, names = pd.factorize(pd.Series(groups).astype(str), sort=True)
+    arrays = {
+        "X": np.ascontiguousarray(X.to_numpy(dtype=np.float32)),
+        "y": np.asarray(y, dtype=np.int8),
+        "groups": codes.astype(np.int32),
+        "train_idx": np.asarray(split[0], dtype=np.int64),
+        "test_idx": np.asarray(split[1], dtype=np.int64),
+    }
+    for name, a in arrays.items():
+        np.save(tmp / f"{name}.npy", a)
+    meta = {"key": key, "created": time.time(), "features": list(X.columns),
+            "label": getattr(y, "name", None) or "y", "group_names": names.tolist(),
+            "rows": int(len(X)), "bytes": int(sum(a.nbytes for a in arrays.values()))}
+    (tmp / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+    if entry.exists():
+        shutil.rmtree(entry)
+    os.replace(tmp, entry)
+    evict(cache_dir, max_entries, max_bytes, keep=key)
+    return entry
+
+def cache_entries(cache_dir: str = CACHE_DIR) -> pd.DataFrame:
+    rows = []
+    for meta_path in Path(cache_dir).glob("*/meta.json"):
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        rows.append({"key": meta["key"], "rows": meta["rows"], "bytes": meta["bytes"],
+                     "last_used": meta_path.stat().st_mtime})
+    return pd.DataFrame(rows, columns=["key", "rows", "bytes", "last_used"])
+
+def evict(cache_dir: str = CACHE_DIR, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES,
+          keep: str = None) -> list:
+    """Drop least recently used entries until both limits hold; returns dropped keys."""
+    entries = cache_entries(cache_dir).sort_values("last_used", ascending=False)
+    keep_mask = entries["key"] == keep
+    entries = pd.concat([entries[keep_mask], entries[~keep_mask]])
+    over = (np.arange(len(entries)) >= max_entries) | (entries["bytes"].cumsum().to_numpy() > max_bytes)
+    over[:1] &= entries["key"].iloc[:1].ne(keep).to_numpy()
+    dropped = entries["key"][over].tolist()
+    for key in dropped:
+        shutil.rmtree(Path(cache_dir) / key, ignore_errors=True)
+    return dropped
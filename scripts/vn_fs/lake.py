@@ -0,0 +1,151 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from schemas import enforce
+
+# ==== Lake layout ====
+# Bronze and silver are Hive-partitioned Parquet datasets:
+#   <root>/year=2023/exchange=HOSE/part-0.parquet
+# Readers push year/exchange filters down to partition pruning and row-group
+# statistics, and only decode the requested columns.
+# Writes go to a hidden staging directory next to the dataset first; finished
+# partitions (or the whole dataset) are then moved into place with os.replace,
+# so a failed write leaves the previous data intact.
+
+KEY_COLS = ["company_id", "year", "quarter"]
+PARTITION_COLS = ["year", "exchange"]
+PARTITIONING = ds.partitioning(pa.schema([("year", pa.int16()), ("exchange", pa.string())]), flavor="hive")
+
+def to_table(df: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+    df = enforce(df.reindex(columns=schema.names))
+    # the explicit schema is the contract; drop pandas' dtype metadata
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False).replace_schema_metadata(None)
+
+def _partition_dir(root: Path, year, exchange) -> Path:
+    return root / f"year={year}" / f"exchange={exchange}"
+
+def _staged_partitions(data: Path) -> set:
+    return {(int(p.parent.name.split("=", 1)[1]), p.name.split("=", 1)[1])
+            for p in data.glob("year=*/exchange=*") if p.is_dir()}
+
+def _stage(root: Path) -> Path:
+    """Empty staging directory on the same filesystem as `root` (os.replace cannot cross devices)."""
+    root.parent.mkdir(parents=True, exist_ok=True)
+    return Path(tempfile.mkdtemp(prefix=f".{root.name}.staging-", dir=root.parent))
+
+def _publish(staged: Path, root: Path, partitions=None):
+    """Move the dataset written to `staged`/data into `root`: all of it when
+    `partitions` is None, else only those (year, exchange) partitions (the ones
+    that were not written are removed). Replaced data goes to `staged`/old."""
+    data, old = staged / "data", staged / "old"
+    old.mkdir()
+    if partitions is None:
+        data.mkdir(exist_ok=True)
+        if root.exists():
+            os.replace(root, old / "dataset")
+        os.replace(data, root)
+    else:
+        for year, exchange in sorted(set(partitions) | _staged_partitions(data)):
+            new, dest = _partition_dir(data, year, exchange), _partition_dir(root, year, exchange)
+            if dest.exists():
+                os.replace(dest, old / f"{year}-{exchange}")
+            if new.exists():
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(new, dest)
+    shutil.rmtree(staged, ignore_errors=True)
+
+def _write_staged(data, root, schema: pa.Schema, mode: str, partitions=None, **kw):
+    root = Path(root)
+    staged = _stage(root)
+    try:
+        if data is not None:
+            ds.write_dataset(data, staged / "data", schema=schema, format="parquet", partitioning=PARTITIONING,
+                             basename_template="part-{i}.parquet", **kw)
+    except BaseException:
+        # nothing published yet: the dataset is untouched
+        shutil.rmtree(staged, ignore_errors=True)
+        raise
+    _publish(staged, root, None if mode == "overwrite" else (partitions or ()))
+    root.mkdir(parents=True, exist_ok=True)
+
+def write_dataset(df: pd.DataFrame, root, schema: pa.Schema, mode: str = "overwrite", partitions=()):
+    """mode="overwrite" replaces the whole dataset, "partitions" only the
+    (year, exchange) partitions present in `df` plus `partitions` (emptied if `df` has no rows for them)."""
+    table = to_table(df.sort_values(KEY_COLS), schema) if not df.empty else None
+    _write_staged(table, root, schema, mode, partitions)
+
+def drop_partitions(root, partitions):
+    _write_staged(None, root, None, "partitions", partitions)
+
+def dataset_exists(root) -> bool:
+    return Path(root).is_dir() and any(Path(root).rglob("*.parquet"))
+
+def read_dataset(root, schema: pa.Schema = None, columns=None, filters=None) -> pd.DataFrame:
+    """Read a partitioned dataset with column projection and filter pushdown.
+
+    `filters` uses pyarrow's DNF form, e.g.
+    [("year", ">=", 2023), ("exchange", "==", "HOSE")].
+    """
+    dataset = ds.dataset(root, format="parquet", partitioning=PARTITIONING, schema=schema)
+    if columns is not None:
+        columns = [c for c in columns if c in dataset.schema.names]
+    expr = pq.filters_to_expression(filters) if filters else None
+    return enforce(dataset.to_table(columns=columns, filter=expr).to_pandas())
+
+def iter_batches(root, batch_size: int = 65536, schema: pa.Schema = None, columns=None, filters=None):
+    """Yield pandas frames of at most `batch_size` rows, partition by partition
+    (sorted by path) so rows come out in the order they were written."""
+    dataset = ds.dataset(root, format="parquet", partitioning=PARTITIONING, schema=schema)
+    if columns is not None:
+        columns = [c for c in columns if c in dataset.schema.names]
+    expr = pq.filters_to_expression(filters) if filters else None
+    for frag in sorted(dataset.get_fragments(filter=expr), key=lambda f: f.path):
+        for batch in frag.to_batches(schema=dataset.schema, columns=columns, filter=expr, batch_size=batch_size):
+            if batch.num_rows:
+                yield enforce(batch.to_pandas())
+
+def write_batches(frames, root, schema: pa.Schema, mode: str = "overwrite"):
+    """Stream frames into a partitioned dataset without holding them all.
+
+    mode="overwrite" starts from an empty dataset, "partitions" only replaces
+    the (year, exchange) partitions the frames touch.
+    """
+    batches = (b for df in frames for b in to_table(df, schema).to_batches())
+    _write_staged(batches, root, schema, mode, preserve_order=True)
+
+def upsert_partitions(root, schema: pa.Schema, rows: pd.DataFrame, keys: pd.DataFrame) -> int:
+    """Replace the rows identified by `keys` (company_id, exchange, year, quarter)
+    with `rows`, rewriting only the (year, exchange) partitions involved.
+
+    Returns the number of partitions rewritten.
+    """
+    parts = pd.concat([keys[["year", "exchange"]], rows.reindex(columns=["year", "exchange"])])
+    partitions = sorted({(int(y), str(ex)) for y, ex in parts.itertuples(index=False)})
+    if not partitions:
+        return 0
+
+    current = None
+    if dataset_exists(root):
+        part_filter = [[("year", "==", y), ("exchange", "==", ex)] for y, ex in partitions]
+        current = read_dataset(root, schema, filters=part_filter)
+        drop = pd.MultiIndex.from_arrays([keys["company_id"].astype(str), keys["year"].astype(int),
+                                          keys["quarter"].astype(str)])
+        cur = pd.MultiIndex.from_arrays([current["company_id"].astype(str), current["year"].astype(int),
+                                         current["quarter"].astype(str)])
+        current = current[~cur.isin(drop)]
+
+    if current is None or current.empty:
+        merged = rows
+    else:
+        merged = pd.concat([current, rows], ignore_index=True) if len(rows) else current
+    write_dataset(merged, root, schema, mode="partitions", partitions=partitions)
+    return len(partitions)
+
+def export_csv(df: pd.DataFrame, out_csv):
+    Path(out_csv).parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(out_csv, index=False)
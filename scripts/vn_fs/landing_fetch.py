@@ -0,0 +1,376 @@
+import os
+import ssl
+import json
+import time
+import asyncio
+import argparse
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import formatdate
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+import pandas as pd
+from run_report import RunReport, add_report_args
+
+# ==== Landing downloader ====
+# Fetches every <quarter>_<stmt>.xlsx for the companies in company_list.csv
+# into data/landing/<exchange>/<symbol>/<year>/, the layout landing_index and
+# bronze_extract read. URLs come from a template with {exchange} {symbol}
+# {year} {quarter} {stmt}. One asyncio loop drives all requests over a small
+# HTTP/1.1 client (stdlib only): per host a pool of keep-alive connections,
+# a concurrency cap and a request rate limit.
+#   - unchanged filings: If-None-Match / If-Modified-Since from the previous
+#     download's ETag / Last-Modified (kept in <landing>/.fetch_state.json);
+#     a 304 costs one round trip and no body
+#   - resume: the body streams into .<name>.part next to the target (the
+#     leading dot keeps it out of landing_index); after a dropped connection
+#     the retry, or the next run, asks for the rest with Range + If-Range
+#   - atomic: the .part file is renamed onto the target only when complete
+#   - 404 = not published (yet), counted as missing, not as an error
+#   - moved filings: 3xx redirects are followed (up to MAX_REDIRECTS hops)
+
+LANDING = "../../data/landing"
+COMPANY_LIST = "company_list.csv"
+STATE_NAME = ".fetch_state.json"
+STMT_TYPES = ["kqkd", "cdkt", "lctt"]
+QUARTERS = ["Q1", "Q2", "Q3", "Q4"]
+URL_TEMPLATE_ENV = "VN_FS_LANDING_URL"
+
+REDIRECTS = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+CHUNK = 64 * 1024
+USER_AGENT = "vn-fs-landing-fetch/1.0"
+
+class RetryableError(Exception):
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+# ==== HTTP/1.1 client ====
+
+class Response:
+    def __init__(self, status: int, headers: dict, reader, timeout: float):
+        self.status, self.headers, self._reader, self._timeout = status, headers, reader, timeout
+        self.complete = False
+        self.keep_alive = headers.get("connection", "").lower() != "close"
+
+    async def _read(self, coro):
+        return await asyncio.wait_for(coro, self._timeout)
+
+    async def iter_chunks(self):
+        """Body chunks; raises IncompleteReadError if the connection drops early."""
+        if self.status in (204, 304):
+            self.complete = True
+            return
+        if self.headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await self._read(self._reader.readline())).split(b";")[0], 16)
+                if size == 0:
+                    while (await self._read(self._reader.readline())) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                yield await self._read(self._reader.readexactly(size))
+                await self._read(self._reader.readexactly(2))
+        elif "content-length" in self.headers:
+            remaining = int(self.headers["content-length"])
+            while remaining:
+                data = await self._read(self._reader.read(min(CHUNK, remaining)))
+                if not data:
+                    raise asyncio.IncompleteReadError(b"", remaining)
+                remaining -= len(data)
+                yield data
+        else:
+            self.keep_alive = False
+            while data := await self._read(self._reader.read(CHUNK)):
+                yield data
+        self.complete = True
+
+    async def drain(self, limit: int = CHUNK):
+        """Read a small unread body so the connection can be reused."""
+        if int(self.headers.get("content-length", limit + 1)) <= limit or self.status in (204, 304):
+            async for _ in self.iter_chunks():
+                pass
+
+class HostPool:
+    """Keep-alive connections, concurrency cap and request rate for one scheme://host:port."""
+
+    def __init__(self, scheme: str, host: str, port: int, concurrency: int, rate: float, timeout: float):
+        self.scheme, self.host, self.port, self.timeout = scheme, host, port, timeout
+        self.slots = asyncio.Semaphore(concurrency)
+        self.interval = 1.0 / rate if rate else 0.0
+        self.idle = []
+        self.opened = 0
+        self._next = 0.0
+
+    async def throttle(self):
+        # each request start reserves the next slot `interval` after the previous one
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def connect(self):
+        ctx = ssl.create_default_context() if self.scheme == "https" else None
+        conn = await asyncio.wait_for(asyncio.open_connection(self.host, self.port, ssl=ctx), self.timeout)
+        self.opened += 1
+        return conn
+
+    def release(self, conn, reusable: bool):
+        if reusable:
+            self.idle.append(conn)
+        else:
+            conn[1].close()
+
+    async def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle = []
+
+class HttpClient:
+    def __init__(self, concurrency: int = 4, rate: float = 5.0, timeout: float = 30.0):
+        self.concurrency, self.rate, self.timeout = concurrency, rate, timeout
+        self.pools = {}
+
+    def pool(self, url: str) -> HostPool:
+        u = urlsplit(url)
+        key = (u.scheme, u.hostname, u.port or (443 if u.scheme == "https" else 80))
+        if key not in self.pools:
+            self.pools[key] = HostPool(*key, self.concurrency, self.rate, self.timeout)
+        return self.pools[key]
+
+    async def _send(self, pool: HostPool, url: str, headers: dict):
+        u = urlsplit(url)
+        target = (u.path or "/") + (f"?{u.query}" if u.query else "")
+        host = u.hostname if u.port is None else f"{u.hostname}:{u.port}"
+        lines = [f"GET {target} HTTP/1.1", f"Host: {host}", f"User-Agent: {USER_AGENT}",
+                 "Accept-Encoding: identity", *[f"{k}: {v}" for k, v in headers.items()]]
+        # a pooled connection may have been closed by the server while idle: try the next / a new one
+        while True:
+            reused = bool(pool.idle)
+            reader, writer = pool.idle.pop() if reused else await pool.connect()
+            try:
+                writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+                await writer.drain()
+                status_line = await asyncio.wait_for(reader.readline(), self.timeout)
+                if not status_line:
+                    raise ConnectionResetError("connection closed before the response")
+                status = int(status_line.split()[1])
+                head = {}
+                while (line := await asyncio.wait_for(reader.readline(), self.timeout)) not in (b"\r\n", b"\n", b""):
+                    k, _, v = line.decode("latin-1").partition(":")
+                    head[k.strip().lower()] = v.strip()
+                return (reader, writer), status, head
+            except Exception as e:
+                writer.close()
+                if not reused or not isinstance(e, (OSError, asyncio.IncompleteReadError)):
+                    raise
+
+    @asynccontextmanager
+    async def get(self, url: str, headers: dict = None):
+        pool = self.pool(url)
+        async with pool.slots:
+            await pool.throttle()
+            conn, status, head = await self._send(pool, url, headers or {})
+            resp = Response(status, head, conn[0], self.timeout)
+            try:
+                yield resp
+                if not resp.complete:
+                    await resp.drain()
+            finally:
+                pool.release(conn, resp.complete and resp.keep_alive)
+
+    async def close(self):
+        for pool in self.pools.values():
+            await pool.close()
+
+    def connections_opened(self) -> int:
+        return sum(p.opened for p in self.pools.values())
+
+# ==== Jobs & state ====
+
+def landing_path(landing: Path, exchange: str, symbol: str, year: int, quarter: str, stmt: str) -> Path:
+    return landing / exchange / symbol / str(year) / f"{quarter}_{stmt}.xlsx"
+
+def part_path(dest: Path) -> Path:
+    return dest.with_name(f".{dest.name}.part")
+
+def build_jobs(comp: pd.DataFrame, landing: Path, url_template: str, years, quarters=QUARTERS,
+               stmt_types=STMT_TYPES) -> list:
+    """(key, url, dest) for every company x year x quarter x statement."""
+    jobs = []
+    for rec in comp[["symbol", "exchange"]].drop_duplicates().to_dict("records"):
+        for year in years:
+            for quarter in quarters:
+                for stmt in stmt_types:
+                    fields = dict(exchange=rec["exchange"], symbol=rec["symbol"], year=year,
+                                  quarter=quarter, stmt=stmt)
+                    dest = landing_path(landing, **fields)
+                    jobs.append((dest.relative_to(landing).as_posix(), url_template.format(**fields), dest))
+    return jobs
+
+def load_state(path: Path) -> dict:
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+def save_state(path: Path, state: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(state, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+def conditional_headers(dest: Path, entry: dict) -> dict:
+    if not dest.exists():
+        return {}
+    if entry.get("size") != dest.stat().st_size:
+        return {}    # replaced or truncated locally since the last download
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    # no state at all (file copied in by hand): the file's mtime is the best validator
+    headers["If-Modified-Since"] = entry.get("last_modified") or formatdate(dest.stat().st_mtime, usegmt=True)
+    return headers
+
+def _retry_after(value) -> float:
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+async def fetch_one(client: HttpClient, key: str, url: str, dest: Path, state: dict,
+                    retries: int = 3, backoff: float = 0.5) -> tuple:
+    """(outcome, bytes received); outcome is downloaded/resumed/not_modified/missing/failed."""
+    entry = state.get(key, {})
+    part = part_path(dest)
+    received = 0
+    target, attempt, hops = url, 0, 0
+    while True:
+        headers = conditional_headers(dest, entry)
+        partial = entry.get("partial")
+        offset = part.stat().st_size if part.exists() and partial else 0
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = partial.get("etag") or partial.get("last_modified")
+        try:
+            async with client.get(target, headers) as resp:
+                if resp.status == 304:
+                    # the complete file is current: a leftover .part is from an abandoned download
+                    part.unlink(missing_ok=True)
+                    if entry.pop("partial", None):
+                        state[key] = entry
+                    return "not_modified", received
+                if resp.status == 404:
+                    return "missing", received
+                if resp.status in REDIRECTS:
+                    location = resp.headers.get("location")
+                    if not location or hops == MAX_REDIRECTS:
+                        print(f"[WARN] Failed {url}: HTTP {resp.status}, "
+                              f"{'no Location' if not location else f'more than {MAX_REDIRECTS} redirects'}")
+                        return "failed", received
+                    # same conditional / range headers on the new location; a redirect is not a retry
+                    target, hops = urljoin(target, location), hops + 1
+                    continue
+                if resp.status == 416:
+                    part.unlink(missing_ok=True)
+                    entry.pop("partial", None)
+                    raise RetryableError("range not satisfiable, restarting")
+                if resp.status == 429 or resp.status >= 500:
+                    raise RetryableError(f"HTTP {resp.status}", _retry_after(resp.headers.get("retry-after")))
+                if resp.status not in (200, 206):
+                    print(f"[WARN] Failed {url}: HTTP {resp.status}")
+                    return "failed", received
+                append = resp.status == 206 and offset > 0
+                validators = {"etag": resp.headers.get("etag"), "last_modified": resp.headers.get("last-modified")}
+                if validators["etag"] or validators["last_modified"]:
+                    entry["partial"] = validators
+                else:
+                    entry.pop("partial", None)
+                state[key] = entry
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                # local-disk writes of 64 KiB chunks: cheap next to the network wait
+                with open(part, "ab" if append else "wb") as f:
+                    async for chunk in resp.iter_chunks():
+                        f.write(chunk)
+                        received += len(chunk)
+                os.replace(part, dest)
+                state[key] = {**validators, "size": dest.stat().st_size, "url": url,
+                              **({"location": target} if target != url else {}),
+                              "fetched_at": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+                return ("resumed" if append else "downloaded"), received
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, RetryableError, ValueError) as e:
+            if attempt == retries:
+                print(f"[WARN] Failed {url}: {type(e).__name__}: {e}")
+                return "failed", received
+            wait = getattr(e, "retry_after", None)
+            await asyncio.sleep(wait if wait is not None else backoff * 2 ** attempt)
+            attempt += 1
+
+async def fetch_all(jobs: list, state: dict, concurrency: int = 4, rate: float = 5.0, retries: int = 3,
+                    timeout: float = 30.0, backoff: float = 0.5) -> dict:
+    client = HttpClient(concurrency, rate, timeout)
+    try:
+        results = await asyncio.gather(*[fetch_one(client, key, url, dest, state, retries, backoff)
+                                         for key, url, dest in jobs])
+    finally:
+        await client.close()
+    stats = {k: 0 for k in ("downloaded", "resumed", "not_modified", "missing", "failed")}
+    for outcome, _ in results:
+        stats[outcome] += 1
+    stats["bytes"] = sum(n for _, n in results)
+    stats["connections"] = client.connections_opened()
+    return stats
+
+def fetch_landing(url_template: str, years, company_list_csv: str = COMPANY_LIST, landing: str = LANDING,
+                  symbols=None, quarters=QUARTERS, concurrency: int = 4, rate: float = 5.0, retries: int = 3,
+                  timeout: float = 30.0, backoff: float = 0.5, report: RunReport = None) -> dict:
+    report = report or RunReport("fetch")
+    landing = Path(landing)
+    comp = pd.read_csv(company_list_csv)
+    if symbols:
+        comp = comp[comp["symbol"].isin(symbols)]
+    jobs = build_jobs(comp, landing, url_template, years, quarters)
+    state_path = landing / STATE_NAME
+    state = load_state(state_path)
+    t0 = time.perf_counter()
+    with report.stage("fetch", rows=len(jobs)) as st:
+        try:
+            stats = asyncio.run(fetch_all(jobs, state, concurrency, rate, retries, timeout, backoff))
+        finally:
+            # also after Ctrl+C: partial validators let the next run resume
+            save_state(state_path, state)
+        st.update(stats)
+    print(f"[OK] Landing fetch: {landing}  files={len(jobs)}  downloaded={stats['downloaded']}  "
+          f"resumed={stats['resumed']}  not_modified={stats['not_modified']}  missing={stats['missing']}  "
+          f"failed={stats['failed']}  bytes={stats['bytes']:,}  connections={stats['connections']}  "
+          f"{time.perf_counter() - t0:.2f}s")
+    return stats
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url-template", default=os.environ.get(URL_TEMPLATE_ENV),
+                    help="e.g. https://host/{exchange}/{symbol}/{year}/{quarter}_{stmt}.xlsx "
+                         f"(default: ${URL_TEMPLATE_ENV})")
+    ap.add_argument("--years", type=int, nargs="+", required=True)
+    ap.add_argument("--quarters", nargs="+", default=QUARTERS)
+    ap.add_argument("--symbols", nargs="*", help="only these symbols from the company list")
+    ap.add_argument("--company-list", default=COMPANY_LIST)
+    ap.add_argument("--landing", default=LANDING)
+    ap.add_argument("--concurrency", type=int, default=4, help="parallel requests (and connections) per host")
+    ap.add_argument("--rate", type=float, default=5.0, help="max requests/s per host (0 = unlimited)")
+    ap.add_argument("--retries", type=int, default=3)
+    ap.add_argument("--timeout", type=float, default=30.0, help="seconds per connect/read")
+    add_report_args(ap)
+    args = ap.parse_args()
+    if not args.url_template:
+        ap.error(f"--url-template or ${URL_TEMPLATE_ENV} is required")
+    report = RunReport("fetch", args.report, args.profile)
+    try:
+        stats = fetch_landing(args.url_template, args.years, args.company_list, args.landing, args.symbols,
+                              args.quarters, args.concurrency, args.rate, args.retries, args.timeout,
+                              report=report)
+    finally:
+        if args.report:
+            report.save()
+    if stats["failed"]:
+        raise SystemExit(1)
@@ -0,0 +1,81 @@
+import os
+import re
+import json
+from pathlib import Path
+
+# ==== Landing index ====
+# One walk over data/landing/<exchange>/<symbol>/<year>/ instead of three
+# globs per (company, year, quarter). Years and quarters are whatever exists
+# on disk, so the bronze work list only contains units that have files.
+
+STATEMENT_FILE = re.compile(r"^(Q\d)_(kqkd|cdkt|lctt)\.(.+)$")
+EXCEL_SUFFIXES = (".xlsx", ".xls")
+
+def _subdirs(path):
+    try:
+        with os.scandir(path) as it:
+            return sorted(e.name for e in it if e.is_dir())
+    except FileNotFoundError:
+        return []
+
+def build_landing_index(root) -> dict:
+    """{(exchange, symbol, year, quarter): {stmt_type: Path}} for every unit on disk."""
+    root = Path(root)
+    index = {}
+    for exchange in _subdirs(root):
+        for symbol in _subdirs(root / exchange):
+            for year in _subdirs(root / exchange / symbol):
+                if not year.isdigit():
+                    continue
+                base = root / exchange / symbol / year
+                with os.scandir(base) as it:
+                    names = sorted(e.name for e in it if e.is_file())
+                for name in names:
+                    m = STATEMENT_FILE.match(name)
+                    if not m:
+                        continue
+                    quarter, stmt_type, _ = m.groups()
+                    files = index.setdefault((exchange, symbol, int(year), quarter), {})
+                    prev = files.get(stmt_type)
+                    # prefer an Excel copy when a filing also exists as PDF/HTML
+                    if prev is None or (prev.suffix.lower() not in EXCEL_SUFFIXES
+                                        and Path(name).suffix.lower() in EXCEL_SUFFIXES):
+                        files[stmt_type] = base / name
+    return index
+
+def units_for_companies(index: dict, comp):
+    """Units of the companies in `comp` (company_list order), by year then quarter."""
+    by_company = {}
+    for key in index:
+        by_company.setdefault((key[0], key[1]), []).append(key)
+    for _, r in comp.iterrows():
+        for key in sorted(by_company.get((r["exchange"], r["symbol"]), []), key=lambda k: (k[2], k[3])):
+            yield key
+
+def save_index(index: dict, root, path):
+    root = Path(root)
+    entries = [
+        {"exchange": ex, "symbol": sym, "year": y, "quarter": q,
+         "files": {t: p.relative_to(root).as_posix() for t, p in files.items()}}
+        for (ex, sym, y, q), files in sorted(index.items())
+    ]
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({"root": str(root), "units": entries}, fh, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def load_index(path, root=None) -> dict:
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    root = Path(root or data["root"])
+    return {
+        (e["exchange"], e["symbol"], e["year"], e["quarter"]): {t: root / p for t, p in e["files"].items()}
+        for e in data["units"]
+    }
+
+if __name__ == "__main__":
+    idx = build_landing_index("../../data/landing")
+    save_index(idx, "../../data/landing", "../../lake/bronze/vn_fs/landing_index.json")
+    print(f"[OK] Landing index saved: units={len(idx)}")
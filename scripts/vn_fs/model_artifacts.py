@@ -0,0 +1,95 @@
+import json
+import hashlib
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import sklearn
+import joblib
+from schemas import arrow_type
+
+# ==== Versioned model artifacts ====
+# Every training run writes a new, immutable version directory:
+#   <model_dir>/<name>/<version>/model.joblib
+#   <model_dir>/<name>/<version>/meta.json
+# and points <model_dir>/<name>/LATEST at it. meta.json records what the model
+# expects (feature order and lake dtypes) and what it was trained on (a
+# fingerprint of X and y), so a scorer can reject mismatched inputs and a rerun
+# on identical data is recognisable. Version ids have 1-second resolution; a
+# collision gets a counter suffix instead of overwriting the earlier version.
+
+MODEL_NAME = "credit_risk_rf"
+ARTIFACT_FORMAT = 1
+
+def data_fingerprint(X: pd.DataFrame, y) -> str:
+    """sha256 over column names, X values and labels (row order matters)."""
+    h = hashlib.sha256()
+    h.update("\x1f".join(map(str, X.columns)).encode())
+    h.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    h.update(np.asarray(y, dtype=np.int64).tobytes())
+    return h.hexdigest()
+
+def claim_version_dir(base: Path, version: str) -> Path:
+    """Create a fresh version directory; a same-second rerun on the same data gets -2, -3, ..."""
+    base.mkdir(parents=True, exist_ok=True)
+    for n in range(1, 1000):
+        out = base / (version if n == 1 else f"{version}-{n}")
+        try:
+            out.mkdir()
+            return out
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"Too many artifacts named {version} under {base}")
+
+def save_artifact(model, features, X: pd.DataFrame, y, model_dir: str, name: str = MODEL_NAME,
+                  label_rule: str = None, metrics: dict = None, extra: dict = None) -> Path:
+    fingerprint = data_fingerprint(X, y)
+    created = datetime.now(timezone.utc)
+    version = f"{created:%Y%m%dT%H%M%SZ}-{fingerprint[:8]}"
+    out = claim_version_dir(Path(model_dir) / name, version)
+    version = out.name
+
+    joblib.dump(model, out / "model.joblib")
+    meta = {
+        "format": ARTIFACT_FORMAT,
+        "name": name,
+        "version": version,
+        "created_at": created.isoformat(timespec="seconds"),
+        "model_class": type(model).__name__,
+        "params": {k: v for k, v in model.get_params().items() if isinstance(v, (str, int, float, bool, type(None)))},
+        "features": list(features),
+        "schema": {c: str(arrow_type(c)) for c in features},
+        "training": {
+            "rows": int(len(X)),
+            "positives": int(np.asarray(y).sum()),
+            "fingerprint": fingerprint,
+            "label_rule": label_rule,
+        },
+        "sklearn_version": sklearn.__version__,
+        "metrics": metrics or {},
+        **(extra or {}),
+    }
+    (out / "meta.json").write_text(json.dumps(meta, indent=2, ensure_ascii=False), encoding="utf-8")
+    (out.parent / "LATEST").write_text(version, encoding="utf-8")
+    return out
+
+def resolve_artifact(path: str, name: str = MODEL_NAME) -> Path:
+    """Accept a version directory, or a model dir / name dir (-> LATEST)."""
+    p = Path(path)
+    if (p / "meta.json").exists():
+        return p
+    for base in (p / name, p):
+        latest = base / "LATEST"
+        if latest.exists():
+            return base / latest.read_text(encoding="utf-8").strip()
+    raise FileNotFoundError(f"No model artifact under {path}. Please run train_baseline.py first.")
+
+def load_artifact(path: str, name: str = MODEL_NAME):
+    """Return (model, meta)."""
+    art = resolve_artifact(path, name)
+    meta = json.loads((art / "meta.json").read_text(encoding="utf-8"))
+    if meta.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"Unsupported artifact format {meta.get('format')} in {art}")
+    if meta.get("sklearn_version") != sklearn.__version__:
+        print(f"[WARN] Model trained with scikit-learn {meta.get('sklearn_version')}, running {sklearn.__version__}")
+    return joblib.load(art / "model.joblib"), meta
@@ -0,0 +1,86 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.utils.class_weight import compute_sample_weight
+
+# ==== Model backends ====
+# A backend builds a fresh model (fit) or continues a previous one on the
+# current training data (update), so quarterly retraining reuses what was
+# already learnt:
+#   rf  - RandomForest on all cores; update keeps the existing trees and grows
+#         `add_trees` new ones on the full current history, dropping the
+#         oldest beyond `max_trees` so the forest follows the recent quarters.
+#   hgb - HistGradientBoosting (binned features, much faster on large tables);
+#         update continues boosting for `add_iter` more iterations from the
+#         previous model's predictions on the current data.
+# Each backend writes artifacts under its own model name.
+
+class RandomForestBackend:
+    name = "rf"
+    model_name = "credit_risk_rf"
+
+    def __init__(self, n_estimators: int = 300, add_trees: int = 100, max_trees: int = 600,
+                 n_jobs: int = -1, random_state: int = 42):
+        self.n_estimators, self.add_trees, self.max_trees = n_estimators, add_trees, max_trees
+        self.n_jobs, self.random_state = n_jobs, random_state
+
+    def new(self):
+        return RandomForestClassifier(n_estimators=self.n_estimators, random_state=self.random_state,
+                                      class_weight="balanced", n_jobs=self.n_jobs)
+
+    def fit(self, X, y):
+        return self.new().fit(X, y)
+
+    def update(self, prev, X, y):
+        keep = max(0, self.max_trees - self.add_trees)
+        prev.estimators_ = prev.estimators_[-keep:] if keep else []
+        # balanced weights from the current labels; class_weight="balanced" itself
+        # is not meant for warm starts on changing data
+        prev.set_params(warm_start=True, class_weight=None, n_jobs=self.n_jobs,
+                        n_estimators=len(prev.estimators_) + self.add_trees)
+        prev.fit(X, y, sample_weight=compute_sample_weight("balanced", y))
+        prev.set_params(warm_start=False)
+        return prev
+
+class HistGBBackend:
+    name = "hgb"
+    model_name = "credit_risk_hgb"
+
+    def __init__(self, max_iter: int = 200, add_iter: int = 50, learning_rate: float = 0.1,
+                 random_state: int = 42):
+        self.max_iter, self.add_iter, self.learning_rate = max_iter, add_iter, learning_rate
+        self.random_state = random_state
+
+    def new(self):
+        # fixed iteration count: early stopping would make warm-start updates stop at once
+        return HistGradientBoostingClassifier(max_iter=self.max_iter, learning_rate=self.learning_rate,
+                                              class_weight="balanced", early_stopping=False,
+                                              random_state=self.random_state)
+
+    def fit(self, X, y):
+        return self.new().fit(X, y)
+
+    def update(self, prev, X, y):
+        prev.set_params(warm_start=True, max_iter=prev.n_iter_ + self.add_iter)
+        prev.fit(X, y)
+        prev.set_params(warm_start=False)
+        return prev
+
+BACKENDS = {b.name: b for b in (RandomForestBackend, HistGBBackend)}
+
+def get_backend(name: str, **params):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend {name!r}, choose from {sorted(BACKENDS)}")
+    return BACKENDS[name](**params)
+
+def warm_start_blocker(backend, prev, meta: dict, features, label_rule: str, y):
+    """Why `prev` cannot be continued on this data (None if it can)."""
+    expected = "RandomForestClassifier" if backend.name == "rf" else "HistGradientBoostingClassifier"
+    if type(prev).__name__ != expected:
+        return f"previous model is {type(prev).__name__}"
+    if list(meta.get("features", [])) != list(features):
+        return "feature list changed"
+    if meta.get("training", {}).get("label_rule") != label_rule:
+        return "labeling rule changed"
+    if not np.array_equal(np.asarray(prev.classes_), np.unique(np.asarray(y))):
+        return "label classes changed"
+    return None
@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import traceback
+from pathlib import Path
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from run_report import RunReport
+
+# ==== Pipeline runner ====
+# landing_index -> bronze -> validate -> silver -> {features, peers, train} -> score
+# Paths come from one config (repo root by default, overridable per key with
+# --config JSON), so it runs from any cwd. A stage's fingerprint hashes its
+# code and the (path, size, mtime) listing of its inputs; when it matches the
+# one stored after the last successful run, the stage is skipped. Stages whose
+# dependencies are done run concurrently in a thread pool (--jobs), and bronze
+# additionally fans landing files out over --workers processes. validate fails
+# on error-level data-quality violations, which blocks silver and everything after.
+
+HERE = Path(__file__).resolve().parent
+REPO_ROOT = HERE.parents[1]
+
+def default_paths(root=REPO_ROOT) -> dict:
+    root = Path(root)
+    lake = root / "lake"
+    return {
+        "landing": root / "data" / "landing",
+        "company_list": HERE / "company_list.csv",
+        "landing_index": lake / "bronze" / "vn_fs" / "landing_index.json",
+        "bronze": lake / "bronze" / "vn_fs" / "financials_quarterly",
+        "violations": lake / "bronze" / "vn_fs" / "quality_violations.parquet",
+        "silver": lake / "silver" / "vn_fs" / "financials_quarterly",
+        "features": lake / "silver" / "vn_fs" / "features_quarterly",
+        "peers": lake / "silver" / "vn_fs" / "peer_features_quarterly",
+        "peer_aggregates": lake / "silver" / "vn_fs" / "peer_aggregates_quarterly.parquet",
+        "models": lake / "models",
+        "train_cache": lake / "cache" / "train_xy",
+        "gold": lake / "gold" / "vn_fs" / "credit_risk_scores",
+        "state": lake / "pipeline_state.json",
+    }
+
+def load_paths(root=REPO_ROOT, config: str = None) -> dict:
+    paths = default_paths(root)
+    if config:
+        with open(config, encoding="utf-8") as fh:
+            # relative entries are relative to the config file
+            paths.update({k: (Path(config).parent / v).resolve() for k, v in json.load(fh).items()})
+    return {k: Path(v) for k, v in paths.items()}
+
+# ==== Stages ====
+
+def run_landing_index(p, opts, report):
+    from landing_index import build_landing_index, save_index
+    with report.stage("index") as st:
+        index = build_landing_index(p["landing"])
+        save_index(index, p["landing"], p["landing_index"])
+        st["rows"] = len(index)
+    print(f"[OK] Landing index saved: {p['landing_index']}  units={len(index)}")
+
+def run_bronze(p, opts, report):
+    from bronze_extract import build_bronze_incremental
+    from landing_index import load_index
+    # the landing_index stage already walked the tree: reuse its output
+    index = load_index(p["landing_index"], p["landing"])
+    build_bronze_incremental(str(p["landing"]), str(p["company_list"]), str(p["bronze"]),
+                             workers=opts["workers"], report=report, index=index)
+
+def run_validate(p, opts, report):
+    from bronze_validate import validate_bronze
+    validate_bronze(str(p["bronze"]), str(p["company_list"]), str(p["violations"]), report=report)
+
+def run_silver(p, opts, report):
+    from silver_transform import silver_transform_incremental
+    silver_transform_incremental(str(p["bronze"]), str(p["silver"]), report=report)
+
+def run_features(p, opts, report):
+    from silver_features import build_features_incremental
+    with report.stage("features"):
+        build_features_incremental(str(p["silver"]), str(p["features"]))
+
+def run_peers(p, opts, report):
+    from silver_peers import build_peers_incremental
+    with report.stage("peers"):
+        build_peers_incremental(str(p["silver"]), str(p["company_list"]), str(p["peers"]),
+                                str(p["peer_aggregates"]))
+
+def run_train(p, opts, report):
+    from train_baseline import build_parser, run_holdout
+    args = build_parser().parse_args(["--silver", str(p["silver"]), "--model-dir", str(p["models"]),
+                                      "--cache-dir", str(p["train_cache"]), "--warm-start"])
+    run_holdout(args, report)
+
+def run_score(p, opts, report):
+    from score_batch import score_batch
+    with report.stage("score") as st:
+        st["rows"] = score_batch(str(p["silver"]), str(p["gold"]), str(p["models"]))["rows"]
+
+# name -> (dependencies, input path keys, modules whose source is part of the fingerprint, runner)
+STAGES = {
+    "landing_index": ([], ["landing"], ["landing_index"], run_landing_index),
+    "bronze": (["landing_index"], ["landing", "company_list", "landing_index"],
+               ["bronze_extract", "sheet_cache", "landing_index", "schemas", "lake"], run_bronze),
+    "validate": (["bronze"], ["bronze", "company_list"],
+                 ["bronze_validate", "ratios", "silver_peers", "schemas", "lake"], run_validate),
+    "silver": (["bronze", "validate"], ["bronze"], ["silver_transform", "ratios", "schemas", "lake"], run_silver),
+    "features": (["silver"], ["silver"], ["silver_features", "schemas", "lake"], run_features),
+    "peers": (["silver"], ["silver", "company_list"], ["silver_peers", "schemas", "lake"], run_peers),
+    "train": (["silver"], ["silver"],
+              ["train_baseline", "model_backends", "feature_cache", "model_artifacts", "schemas", "lake"],
+              run_train),
+    "score": (["train", "silver"], ["silver", "models"],
+              ["score_batch", "model_artifacts", "train_baseline", "schemas", "lake"], run_score),
+}
+
+# ==== Fingerprints & state ====
+
+def path_listing(path: Path) -> list:
+    """(relative path, size, mtime_ns) for a file or every file under a directory."""
+    if not path.exists():
+        return [("<missing>", 0, 0)]
+    if path.is_file():
+        st = path.stat()
+        return [(path.name, st.st_size, st.st_mtime_ns)]
+    out = []
+    for dirpath, _, names in os.walk(path):
+        for name in names:
+            f = Path(dirpath) / name
+            st = f.stat()
+            out.append((f.relative_to(path).as_posix(), st.st_size, st.st_mtime_ns))
+    return sorted(out)
+
+def stage_fingerprint(name: str, paths: dict) -> str:
+    _, inputs, modules, _ = STAGES[name]
+    h = hashlib.sha256(name.encode())
+    for m in modules:
+        h.update((HERE / f"{m}.py").read_bytes())
+    for key in inputs:
+        h.update(key.encode())
+        h.update(json.dumps(path_listing(paths[key])).encode())
+    return h.hexdigest()
+
+def load_state(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+def save_state(path: Path, state: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh, indent=2)
+    os.replace(tmp, path)
+
+def upstream(targets) -> list:
+    """`targets` plus everything they depend on, in STAGES order."""
+    need, todo = set(), list(targets)
+    while todo:
+        s = todo.pop()
+        if s not in need:
+            need.add(s)
+            todo.extend(STAGES[s][0])
+    return [s for s in STAGES if s in need]
+
+# ==== Runner ====
+
+def run_pipeline(paths: dict, targets=None, force=(), jobs: int = 2, workers: int = 1,
+                 dry_run: bool = False, report_path: str = None) -> dict:
+    order = upstream(targets or list(STAGES))
+    force = set(order) if "all" in force else set(force)
+    state = load_state(paths["state"])
+    opts = {"workers": workers}
+    status, reports = {}, {}
+
+    def ready(name):
+        return all(status.get(d) in ("done", "skipped", "would_run") for d in STAGES[name][0] if d in order)
+
+    def blocked(name):
+        return any(status.get(d) in ("failed", "blocked") for d in STAGES[name][0] if d in order)
+
+    def execute(name):
+        # fingerprint right before running: upstream outputs are final by now
+        fp = stage_fingerprint(name, paths)
+        upstream_changes = any(status.get(d) == "would_run" for d in STAGES[name][0])
+        if name not in force and not upstream_changes and state.get(name, {}).get("fingerprint") == fp:
+            return name, "skipped", fp, None
+        if dry_run:
+            return name, "would_run", fp, None
+        # with jobs > 1 stages share the process: RSS and child CPU overlap between them
+        report = RunReport(name, concurrent=jobs > 1)
+        t0 = time.perf_counter()
+        STAGES[name][3](paths, opts, report)
+        reports[name] = report.to_dict()
+        return name, "done", fp, time.perf_counter() - t0
+
+    pending = list(order)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as ex:
+        while pending or running:
+            for name in [n for n in pending if blocked(n)]:
+                status[name] = "blocked"
+                pending.remove(name)
+                print(f"[WARN] {name}: skipped, an upstream stage failed")
+            for name in [n for n in pending if ready(n)]:
+                pending.remove(name)
+                running[ex.submit(execute, name)] = name
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                try:
+                    _, st, fp, wall = fut.result()
+                except Exception:
+                    status[name] = "failed"
+                    print(f"[ERROR] {name} failed:\n{traceback.format_exc()}")
+                    continue
+                status[name] = st
+                if st == "done":
+                    # fingerprint taken before the run: inputs that change mid-run trigger a rerun
+                    state[name] = {"fingerprint": fp, "finished_at": datetime.now(timezone.utc)
+                                   .isoformat(timespec="seconds"), "wall_s": round(wall, 3)}
+                    save_state(paths["state"], state)
+                    print(f"[OK] {name} done in {wall:.2f}s")
+                else:
+                    print(f"[OK] {name}: {'up to date, skipped' if st == 'skipped' else 'would run'}")
+
+    if report_path:
+        Path(report_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(report_path, "w", encoding="utf-8") as fh:
+            json.dump({"status": status, "jobs": jobs, "stages": reports}, fh, indent=2, ensure_ascii=False)
+        print(f"[OK] Run report: {report_path}")
+    return status
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("targets", nargs="*", metavar="STAGE",
+                    help=f"stages to bring up to date (with their upstream); default all of {list(STAGES)}")
+    ap.add_argument("--root", default=str(REPO_ROOT), help="repo root the default paths hang off")
+    ap.add_argument("--config", default=None, help="JSON overriding individual paths, e.g. {\"landing\": \"...\"}")
+    ap.add_argument("--force", nargs="*", default=(), metavar="STAGE", help="run even if fresh ('all')")
+    ap.add_argument("--jobs", type=int, default=2, help="stages run concurrently")
+    ap.add_argument("--workers", type=int, default=1, help="bronze process pool size")
+    ap.add_argument("--dry-run", action="store_true", help="only report which stages would run")
+    ap.add_argument("--report", default=None, help="write per-stage timings as JSON")
+    args = ap.parse_args()
+    unknown = (set(args.targets) | set(args.force)) - {"all"} - set(STAGES)
+    if unknown:
+        ap.error(f"unknown stage(s): {sorted(unknown)}")
+    status = run_pipeline(load_paths(args.root, args.config), args.targets, args.force, args.jobs,
+                          args.workers, args.dry_run, args.report)
+    raise SystemExit(1 if any(s in ("failed", "blocked") for s in status.values()) else 0)
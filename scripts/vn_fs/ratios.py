@@ -0,0 +1,141 @@
+from collections.abc import Mapping
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# ==== Ratio registry ====
+# Every derived amount and ratio is declared once as name -> (op, inputs, policy).
+# compile_plan resolves the dependencies of the requested names into one
+# evaluation order (cached); evaluate runs it over float64 NumPy arrays, one
+# array per input column and one new array per node, so a ratio costs one
+# array op instead of a DataFrame column copy and nothing is written back to
+# the input. Intermediates already present in the input are taken as given;
+# ratios are always recomputed. Inputs that are neither present nor declared
+# are treated as missing (NaN).
+#   sum      - nan-aware sum, NaN only when every input is missing
+#   sub      - first minus second, NaN if either is missing
+#   sub0     - first minus the rest, missing parts count as 0
+#   coalesce - first non-missing input (NaN if none / no inputs)
+#   div      - numerator / denominator under a division policy:
+#              "eps"    x / (y + 1e-9), silver's rule (zero denominator -> huge ratio)
+#              "strict" NaN when the denominator is 0 or missing (clean_* scripts)
+
+EPS = 1e-9
+RATIO_DECIMALS = 4
+
+RATIOS = {
+    # intermediates
+    "expenses": ("sum", ["cogs", "opex"], None),
+    "operating_profit": ("sub", ["revenue", "expenses"], None),
+    "debt_total": ("sum", ["short_term_debt", "long_term_debt"], None),
+    "current_assets": ("coalesce", [], None),
+    "current_liabilities": ("coalesce", ["short_term_debt"], None),
+    "ebit": ("sub0", ["gross_profit", "selling_expenses", "admin_expenses"], None),
+    # ratios
+    "roe": ("div", ["net_profit", "equity"], "eps"),
+    "roa": ("div", ["net_profit", "total_assets"], "eps"),
+    "debt_to_equity": ("div", ["debt_total", "equity"], "eps"),
+    "current_ratio": ("div", ["current_assets", "current_liabilities"], "eps"),
+    "interest_coverage": ("div", ["operating_profit", "interest_expense"], "eps"),
+    "net_margin": ("div", ["net_profit", "revenue"], "eps"),
+    "liabilities_to_equity": ("div", ["total_liabilities", "equity"], "strict"),
+    "ebit_coverage": ("div", ["ebit", "interest_expense"], "strict"),
+}
+
+def is_ratio(name: str) -> bool:
+    return RATIOS[name][0] == "div"
+
+@lru_cache(maxsize=64)
+def compile_plan(names: tuple, available: frozenset = frozenset()) -> tuple:
+    """Registry nodes to evaluate for `names`, dependencies first."""
+    plan = []
+
+    def visit(name, path):
+        if name not in RATIOS or name in plan or (name in available and not is_ratio(name)):
+            return
+        if name in path:
+            raise ValueError(f"Ratio registry cycle: {' -> '.join(path + (name,))}")
+        for dep in RATIOS[name][1]:
+            visit(dep, path + (name,))
+        plan.append(name)
+
+    for name in names:
+        if name not in RATIOS:
+            raise KeyError(f"Unknown ratio {name!r}")
+        visit(name, ())
+    return tuple(plan)
+
+def _sum(args, n):
+    out, seen = np.zeros(n), np.zeros(n, dtype=bool)
+    for a in args:
+        ok = ~np.isnan(a)
+        out += np.where(ok, a, 0.0)
+        seen |= ok
+    out[~seen] = np.nan
+    return out
+
+def _sub0(args, n):
+    out = np.where(np.isnan(args[0]), 0.0, args[0])
+    for a in args[1:]:
+        out -= np.where(np.isnan(a), 0.0, a)
+    return out
+
+def _coalesce(args, n):
+    out = np.full(n, np.nan)
+    for a in reversed(args):
+        out = np.where(np.isnan(a), out, a)
+    return out
+
+def _divide(num, den, policy):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if policy == "eps":
+            return num / (den + EPS)
+        if policy == "strict":
+            return np.where((den != 0) & ~np.isnan(den), num / den, np.nan)
+    raise ValueError(f"Unknown division policy {policy!r}")
+
+OPS = {
+    "sum": _sum,
+    "sub": lambda args, n: args[0] - args[1],
+    "sub0": _sub0,
+    "coalesce": _coalesce,
+}
+
+def evaluate(data, names, policy: str = None, decimals: int = None) -> dict:
+    """{name: float64 array} for the registry `names` over a DataFrame or a mapping of columns/scalars.
+
+    `policy` overrides every ratio's division policy; `decimals` rounds the ratios.
+    """
+    names = list(names)
+    if isinstance(data, pd.DataFrame):
+        available, n = frozenset(data.columns), len(data)
+    elif isinstance(data, Mapping):
+        available = frozenset(data)
+        n = max((len(v) for v in data.values() if isinstance(v, (np.ndarray, pd.Series, list))), default=1)
+    else:
+        raise TypeError("data must be a DataFrame or a mapping")
+
+    values = {}
+
+    def get(name):
+        if name not in values:
+            if name in available:
+                col = data[name]
+                values[name] = (col.to_numpy(dtype=float, na_value=np.nan) if isinstance(col, pd.Series)
+                                else np.broadcast_to(np.asarray(np.nan if col is None else col, dtype=float), n))
+            else:
+                values[name] = np.full(n, np.nan)
+        return values[name]
+
+    for name in compile_plan(tuple(names), available):
+        op, inputs, pol = RATIOS[name]
+        args = [get(c) for c in inputs]
+        values[name] = _divide(*args, policy or pol) if op == "div" else OPS[op](args, n)
+        if decimals is not None and op == "div":
+            np.round(values[name], decimals, out=values[name])
+    return {name: get(name) for name in names}
+
+def with_ratios(df: pd.DataFrame, names, policy: str = None, decimals: int = None) -> pd.DataFrame:
+    """`df` plus the registry columns `names` (recomputed ones replaced in place, new ones appended)."""
+    values = evaluate(df, names, policy, decimals)
+    return df.assign(**{c: v for c, v in values.items() if c not in df.columns or is_ratio(c)})
@@ -0,0 +1,155 @@
+import io
+import os
+import sys
+import json
+import time
+import socket
+import pstats
+import cProfile
+import platform
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak RSS is reported as null
+    resource = None
+
+# ==== Run report ====
+# Each script opens named stages; every stage records wall time, CPU time of
+# the thread that ran it (cpu_s), CPU of worker processes reaped meanwhile
+# (child_cpu_s), rows and rows/s, and the peak RSS seen so far. The run totals
+# (cpu_s, peak RSS) and the per-stage child_cpu_s / peak_rss_mb are
+# process-wide: when stages run concurrently (pipeline --jobs > 1) they
+# overlap, and the report lists them under "process_wide". Bronze also records per-file timings (openpyxl read vs.
+# label matching/parsing), summarised with the slowest N files. Stages listed
+# in `profile` ("all" for every stage) run under cProfile; the .prof file is
+# written next to the report and the top functions are embedded in it. Only
+# the calling process is profiled: use --workers 1 to see inside file parsing.
+
+def peak_rss_mb(children: bool = False):
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    rss = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(rss / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+def cpu_seconds() -> float:
+    """Whole process plus reaped children."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+def child_cpu_seconds() -> float:
+    t = os.times()
+    return t.children_user + t.children_system
+
+PROCESS_WIDE = ["cpu_s", "peak_rss_mb", "peak_rss_children_mb", "stages[].child_cpu_s", "stages[].peak_rss_mb"]
+
+class RunReport:
+    def __init__(self, name: str, path: str = None, profile=(), slowest: int = 10, concurrent: bool = False):
+        """`concurrent`: other work runs in this process meanwhile (marks the process-wide fields)."""
+        self.name, self.path, self.concurrent = name, path, concurrent
+        self.profile = set(profile or ())
+        self.slowest = slowest
+        self.started = datetime.now(timezone.utc)
+        self._t0, self._cpu0 = time.perf_counter(), cpu_seconds()
+        self.stages = []
+        self.files = []
+
+    @contextmanager
+    def stage(self, name: str, rows: int = None):
+        """Time a block; set info["rows"] (and any other key) inside it."""
+        info = {"rows": rows}
+        prof = cProfile.Profile() if ("all" in self.profile or name in self.profile) else None
+        t0, cpu0, child0 = time.perf_counter(), time.thread_time(), child_cpu_seconds()
+        if prof:
+            prof.enable()
+        try:
+            yield info
+        finally:
+            if prof:
+                prof.disable()
+            wall = time.perf_counter() - t0
+            entry = {"stage": name, "wall_s": round(wall, 4), "cpu_s": round(time.thread_time() - cpu0, 4),
+                     "child_cpu_s": round(child_cpu_seconds() - child0, 4), **info}
+            if entry["rows"] is not None:
+                entry["rows_per_s"] = round(entry["rows"] / wall, 1) if wall > 0 else None
+            entry["peak_rss_mb"] = peak_rss_mb()
+            if prof:
+                entry["profile"] = self._dump_profile(name, prof)
+            self.stages.append(entry)
+
+    def _dump_profile(self, stage: str, prof: cProfile.Profile, top: int = 15) -> dict:
+        out = {}
+        if self.path:
+            prof_path = Path(self.path).with_name(f"{Path(self.path).stem}.{stage}.prof")
+            prof_path.parent.mkdir(parents=True, exist_ok=True)
+            prof.dump_stats(prof_path)
+            out["file"] = str(prof_path)
+        stats = pstats.Stats(prof, stream=io.StringIO())
+        rows = sorted(stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)[:top]
+        out["top_cumulative"] = [
+            {"function": f"{Path(fn).name}:{line}({func})", "ncalls": nc, "tottime": round(tt, 4),
+             "cumtime": round(ct, 4)}
+            for (fn, line, func), (_, nc, tt, ct, _) in rows
+        ]
+        return out
+
+    def add_files(self, timings):
+        """timings: iterable of dicts with path, wall_s, cpu_s, read_s, parse_s."""
+        self.files.extend(timings)
+
+    def file_summary(self) -> dict:
+        if not self.files:
+            return {}
+        wall = np.array([f["wall_s"] for f in self.files])
+        total = lambda k: round(float(sum(f.get(k, 0.0) for f in self.files)), 4)
+        slow = sorted(self.files, key=lambda f: f["wall_s"], reverse=True)[:self.slowest]
+        return {
+            "count": len(self.files), "wall_s": total("wall_s"), "cpu_s": total("cpu_s"),
+            "read_s": total("read_s"), "parse_s": total("parse_s"),
+            "p50_ms": round(float(np.percentile(wall, 50)) * 1000, 2),
+            "p95_ms": round(float(np.percentile(wall, 95)) * 1000, 2),
+            "slowest": [{k: (round(v, 4) if isinstance(v, float) else v) for k, v in f.items()} for f in slow],
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "run": self.name,
+            "started_at": self.started.isoformat(timespec="seconds"),
+            "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "host": socket.gethostname(), "python": platform.python_version(), "pid": os.getpid(),
+            "argv": sys.argv,
+            "wall_s": round(time.perf_counter() - self._t0, 4),
+            "cpu_s": round(cpu_seconds() - self._cpu0, 4),
+            "peak_rss_mb": peak_rss_mb(), "peak_rss_children_mb": peak_rss_mb(children=True),
+            "stages": self.stages,
+            "files": self.file_summary(),
+            **({"process_wide": PROCESS_WIDE} if self.concurrent else {}),
+        }
+
+    def save(self, path: str = None):
+        """Write the JSON report (no-op without a path) and print a one-line summary per stage."""
+        path = path or self.path
+        rep = self.to_dict()
+        for s in rep["stages"]:
+            rate = f"  {s['rows_per_s']:,.0f} rows/s" if s.get("rows_per_s") else ""
+            child = f" +children={s['child_cpu_s']:.3f}s" if s.get("child_cpu_s") else ""
+            print(f"[TIME] {self.name}.{s['stage']}: wall={s['wall_s']:.3f}s cpu={s['cpu_s']:.3f}s{child}{rate}")
+        if not path:
+            return rep
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(rep, fh, indent=2, ensure_ascii=False)
+        print(f"[OK] Run report: {path}")
+        return rep
+
+def add_report_args(ap, slowest: bool = False):
+    ap.add_argument("--report", default=None, help="write a JSON run report (timings, RSS, profile) here")
+    ap.add_argument("--profile", nargs="*", default=(), metavar="STAGE",
+                    help="run these stages under cProfile ('all' for every stage)")
+    if slowest:
+        ap.add_argument("--slowest", type=int, default=10, help="slowest landing files kept in the report")
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# ==== Schema registry ====
+# Column names and compact dtypes shared by bronze, silver, training and the
+# clean_* scripts. Identifiers are categorical, year is int16, amounts in VND
+# stay float64 (they exceed float32's ~7 significant digits) and ratios,
+# already rounded to 4 decimals, are float32.
+
+ID_COLS = ["company_id", "exchange", "year", "quarter"]
+KEY_COLS = ["company_id", "year", "quarter"]
+
+AMOUNT_COLS = [
+    "revenue", "cogs", "opex", "net_profit", "total_assets", "equity",
+    "short_term_debt", "long_term_debt", "cashflow_ops", "interest_expense",
+]
+INTERMEDIATE_COLS = ["expenses", "operating_profit", "debt_total", "current_assets", "current_liabilities"]
+RATIO_COLS = ["roe", "roa", "debt_to_equity", "current_ratio", "interest_coverage", "net_margin"]
+
+BRONZE_COLS = ID_COLS + AMOUNT_COLS
+SILVER_COLS = BRONZE_COLS + INTERMEDIATE_COLS + RATIO_COLS
+
+# Time-series features (silver_features.py), per company over consecutive quarters
+TS_WINDOW = 4
+TS_LAG_COLS = RATIO_COLS
+TS_GROWTH_COLS = ["revenue", "net_profit", "total_assets"]
+TS_TTM_COLS = ["revenue", "net_profit"]
+TS_VOL_COLS = ["roe", "net_margin"]
+TS_SOURCE_COLS = list(dict.fromkeys(TS_LAG_COLS + TS_GROWTH_COLS + TS_TTM_COLS + TS_VOL_COLS))
+TS_FEATURE_COLS = (
+    [f"{c}_lag1" for c in TS_LAG_COLS]
+    + [f"{c}_{g}" for c in TS_GROWTH_COLS for g in ("qoq", "yoy")]
+    + [f"{c}_ttm" for c in TS_TTM_COLS]
+    + [f"{c}_vol{TS_WINDOW}" for c in TS_VOL_COLS]
+)
+# Peer-relative features (silver_peers.py), per (industry, year, quarter) from company_list
+PEER_COLS = RATIO_COLS
+PEER_QUANTILES = [round(i / 20, 2) for i in range(21)]   # p00, p05, ..., p100 stored per group
+PEER_FEATURE_COLS = [f"{c}_peer_pct" for c in PEER_COLS] + [f"{c}_peer_z" for c in PEER_COLS]
+
+# TTM sums are VND amounts; lags of ratios, growth rates and volatilities fit float32
+FLOAT32_COLS = (set(RATIO_COLS) | {c for c in TS_FEATURE_COLS if not c.endswith("_ttm")}
+                | set(PEER_FEATURE_COLS) | {"risk_score"})
+
+FEATURE_COLS = [
+    "revenue", "cogs", "opex", "net_profit", "total_assets", "equity",
+    "short_term_debt", "long_term_debt", "cashflow_ops",
+    "roe", "roa", "debt_to_equity", "current_ratio", "interest_coverage", "net_margin",
+]
+LABEL_COL = "credit_risk"
+LABEL_INPUTS = ["debt_to_equity", "net_margin", "interest_coverage", "cashflow_ops", "current_ratio"]
+
+# Gold: model output per (company_id, year, quarter)
+SCORE_COLS = ["risk_score", "risk_label", "model_version"]
+
+# Output of the clean_* scripts (one row per company-year, multi-sheet workbooks)
+CLEAN_COLS = [
+    "company_id", "year",
+    "total_assets", "equity", "total_liabilities", "current_assets", "current_liabilities",
+    "cash_and_equivalents", "short_term_debt", "long_term_debt",
+    "revenue", "gross_profit", "net_income", "selling_expenses", "admin_expenses", "interest_expenses",
+    "cashflow_ops", "cashflow_investing", "cashflow_financing",
+]
+# clean_* naming -> bronze/silver naming, for joins across the two schemes
+CLEAN_TO_CANONICAL = {"net_income": "net_profit", "interest_expenses": "interest_expense"}
+
+CATEGORY_COLS = {"company_id", "exchange", "quarter", "model_version", "industry"}
+INT8_COLS = {LABEL_COL, "risk_label"}
+
+def pandas_dtype(col: str):
+    if col in CATEGORY_COLS:
+        return "category"
+    if col == "year":
+        return "int16"
+    if col in INT8_COLS:
+        return "int8"
+    if col in FLOAT32_COLS:
+        return "float32"
+    return "float64"
+
+def arrow_type(col: str) -> pa.DataType:
+    if col == "exchange":
+        # partition column: plain string in the Hive path, categorical in pandas
+        return pa.string()
+    if col in CATEGORY_COLS:
+        return pa.dictionary(pa.int32(), pa.string())
+    if col == "year":
+        return pa.int16()
+    if col in INT8_COLS:
+        return pa.int8()
+    if col in FLOAT32_COLS:
+        return pa.float32()
+    return pa.float64()
+
+def arrow_schema(cols) -> pa.Schema:
+    cols = list(dict.fromkeys(cols))
+    ordered = [c for c in ID_COLS if c in cols or c in ("exchange", "year")] + [c for c in cols if c not in ID_COLS]
+    return pa.schema([(c, arrow_type(c)) for c in ordered])
+
+def enforce(df: pd.DataFrame, cols=None) -> pd.DataFrame:
+    """Cast `df` in place to the registry dtypes (unknown columns -> float64)."""
+    for c in (cols if cols is not None else df.columns):
+        if c not in df.columns:
+            continue
+        dtype = pandas_dtype(c)
+        if str(df[c].dtype) == dtype:
+            continue
+        if dtype == "category":
+            df[c] = df[c].astype("string").astype("category")
+        elif dtype.startswith("int"):
+            df[c] = pd.to_numeric(df[c]).astype(dtype)
+        else:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype(dtype)
+    return df
+
+def _default_dtype_bytes(s: pd.Series) -> int:
+    # what the column would cost with pandas' defaults (object strings, 64-bit numbers)
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        sizes = pd.Series(s.cat.categories, dtype=object).map(lambda v: len(str(v)) + 49).to_numpy()
+        counts = np.bincount(s.cat.codes[s.cat.codes >= 0], minlength=len(sizes))
+        return int(len(s) * 8 + (sizes * counts).sum())
+    return int(len(s) * 8)
+
+def memory_report(df: pd.DataFrame, stage: str, top: int = None) -> pd.DataFrame:
+    """Per-column memory, compact dtypes vs. pandas defaults; printed and returned."""
+    rep = pd.DataFrame({
+        "dtype": df.dtypes.astype(str),
+        "bytes": df.memory_usage(index=False, deep=True),
+        "default_bytes": pd.Series({c: _default_dtype_bytes(df[c]) for c in df.columns}),
+    })
+    rep = rep.sort_values("bytes", ascending=False)
+    total, default = int(rep["bytes"].sum()), int(rep["default_bytes"].sum())
+    print(f"[MEM] {stage}: rows={len(df)}  {total / 2**20:.2f} MiB  "
+          f"(defaults {default / 2**20:.2f} MiB, saved {1 - total / max(default, 1):.0%})")
+    print(rep.head(top).to_string() if top else rep.to_string())
+    return rep
@@ -0,0 +1,92 @@
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+from schemas import ID_COLS, SCORE_COLS, arrow_schema, arrow_type
+from lake import PARTITIONING, iter_batches, write_batches, dataset_exists
+from model_artifacts import load_artifact
+from train_baseline import feature_matrix
+
+# ==== Batch scoring: silver -> gold ====
+# The model artifact is loaded once; silver is streamed partition by partition
+# in batches of --batch-size rows, so memory stays flat however large the lake
+# gets. Each batch is scored with one predict_proba call and streamed into the
+# gold dataset with the same (year, exchange) partitioning as silver.
+
+SILVER_PATH = "../../lake/silver/vn_fs/financials_quarterly"
+GOLD_PATH = "../../lake/gold/vn_fs/credit_risk_scores"
+MODEL_DIR = "../../lake/models"
+GOLD_SCHEMA = arrow_schema(ID_COLS + SCORE_COLS)
+
+def check_inputs(silver_path: str, meta: dict):
+    """Warn about features the silver dataset lacks or stores with another type."""
+    schema = ds.dataset(silver_path, format="parquet", partitioning=PARTITIONING).schema
+    for col, typ in meta["schema"].items():
+        if col not in schema.names:
+            print(f"[WARN] Feature missing in silver, scored as 0.0: {col}")
+        elif str(schema.field(col).type) != typ and str(arrow_type(col)) != typ:
+            print(f"[WARN] Feature {col}: silver {schema.field(col).type}, model trained on {typ}")
+
+def positive_proba(model, X: pd.DataFrame) -> np.ndarray:
+    classes = list(model.classes_)
+    if 1 not in classes:
+        return np.zeros(len(X), dtype=np.float32)
+    # models fitted on a DataFrame keep feature names; CV models were fitted on an array
+    Xin = X if hasattr(model, "feature_names_in_") else np.ascontiguousarray(X.to_numpy(dtype=np.float32))
+    return model.predict_proba(Xin)[:, classes.index(1)].astype(np.float32)
+
+def score_frames(model, meta: dict, frames, threshold: float, stats: dict):
+    features = meta["features"]
+    for df in frames:
+        t0 = time.perf_counter()
+        proba = positive_proba(model, feature_matrix(df, features))
+        stats["predict_s"] += time.perf_counter() - t0
+        stats["rows"] += len(df)
+        stats["batches"] += 1
+        out = df[ID_COLS].copy()
+        out["risk_score"] = proba
+        out["risk_label"] = (proba >= threshold).astype(np.int8)
+        out["model_version"] = meta["version"]
+        yield out
+
+def score_batch(silver_path: str = SILVER_PATH, gold_path: str = GOLD_PATH, model_path: str = MODEL_DIR,
+                batch_size: int = 50_000, filters=None, threshold: float = 0.5) -> dict:
+    if not dataset_exists(silver_path):
+        raise FileNotFoundError(f"Silver not found: {silver_path}. Please run silver_transform.py first.")
+    t_load = time.perf_counter()
+    model, meta = load_artifact(model_path)
+    t_load = time.perf_counter() - t_load
+    check_inputs(silver_path, meta)
+
+    stats = {"rows": 0, "batches": 0, "predict_s": 0.0}
+    t0 = time.perf_counter()
+    frames = iter_batches(silver_path, batch_size, columns=ID_COLS + meta["features"], filters=filters)
+    # with a filter only the scored partitions are replaced, the rest of gold is kept
+    write_batches(score_frames(model, meta, frames, threshold, stats), gold_path, GOLD_SCHEMA,
+                  mode="partitions" if filters else "overwrite")
+    elapsed = time.perf_counter() - t0
+
+    stats.update(model_version=meta["version"], load_s=t_load, elapsed_s=elapsed,
+                 rows_per_s=stats["rows"] / elapsed if elapsed else 0.0)
+    print(f"[OK] Scores saved: {gold_path}  model={meta['version']}  rows={stats['rows']}  "
+          f"batches={stats['batches']}  {stats['rows_per_s']:,.0f} rows/s "
+          f"(predict {stats['predict_s']:.2f}s of {elapsed:.2f}s, model load {t_load:.2f}s)")
+    return stats
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default=MODEL_DIR, help="artifact version dir, or model dir (uses LATEST)")
+    ap.add_argument("--silver", default=SILVER_PATH)
+    ap.add_argument("--out", default=GOLD_PATH)
+    ap.add_argument("--batch-size", type=int, default=50_000)
+    ap.add_argument("--threshold", type=float, default=0.5)
+    ap.add_argument("--year", type=int, nargs="*", help="only score these years")
+    ap.add_argument("--exchange", nargs="*", help="only score these exchanges")
+    args = ap.parse_args()
+    filters = []
+    if args.year:
+        filters.append(("year", "in", args.year))
+    if args.exchange:
+        filters.append(("exchange", "in", args.exchange))
+    score_batch(args.silver, args.out, args.model, args.batch_size, filters or None, args.threshold)
@@ -0,0 +1,257 @@
+import json
+import math
+import time
+import queue
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.request import Request, urlopen
+import numpy as np
+import pandas as pd
+from schemas import ID_COLS, AMOUNT_COLS, RATIO_COLS, enforce
+from silver_transform import compute_ratios
+from model_artifacts import load_artifact
+from score_batch import MODEL_DIR, positive_proba
+from train_baseline import feature_matrix
+
+# ==== Local scoring service ====
+# The model artifact is loaded once at start-up. Each HTTP request thread
+# validates its raw statement record(s) and hands them to one batching thread,
+# which waits up to --max-wait-ms for more requests (or --max-batch records),
+# computes compute_ratios + predict_proba once for the whole group and wakes
+# the callers. Latency is measured per request from arrival to response.
+#
+#   POST /score    {"company_id": "FPT", "year": 2024, "quarter": "Q1", "revenue": ..., ...}
+#                  or a JSON list of such records
+#   GET  /metrics  request count, p50/p90/p99 latency (ms), batch sizes
+#   GET  /health
+
+class LatencyStats:
+    def __init__(self, window: int = 10_000):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+
+    def add_request(self, seconds: float, ok: bool = True):
+        with self.lock:
+            self.requests += 1
+            self.errors += not ok
+            self.latencies.append(seconds)
+
+    def add_batch(self, size: int):
+        with self.lock:
+            self.batch_sizes.append(size)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            lat = np.array(self.latencies) * 1000
+            sizes = np.array(self.batch_sizes)
+            snap = {"requests": self.requests, "errors": self.errors, "batches": len(sizes)}
+        if len(lat):
+            p50, p90, p99 = np.percentile(lat, [50, 90, 99])
+            snap.update(p50_ms=round(p50, 3), p90_ms=round(p90, 3), p99_ms=round(p99, 3),
+                        max_ms=round(lat.max(), 3))
+        if len(sizes):
+            snap.update(mean_batch=round(sizes.mean(), 2), max_batch=int(sizes.max()))
+        return snap
+
+class _Pending:
+    __slots__ = ("records", "done", "result", "error")
+
+    def __init__(self, records):
+        self.records = records
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class MicroBatcher:
+    def __init__(self, model, meta: dict, stats: LatencyStats, max_batch: int = 64, max_wait_ms: float = 2.0):
+        self.model, self.meta, self.stats = model, meta, stats
+        self.max_batch, self.max_wait = max_batch, max_wait_ms / 1000
+        self.queue = queue.Queue()
+        threading.Thread(target=self._loop, name="micro-batcher", daemon=True).start()
+
+    def submit(self, records: list) -> list:
+        p = _Pending(records)
+        self.queue.put(p)
+        p.done.wait()
+        if p.error is not None:
+            raise p.error
+        return p.result
+
+    def _loop(self):
+        while True:
+            group = [self.queue.get()]
+            n = len(group[0].records)
+            deadline = time.perf_counter() + self.max_wait
+            while n < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    p = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                group.append(p)
+                n += len(p.records)
+            self._run(group)
+
+    def _run(self, group: list):
+        try:
+            results = self.score([r for p in group for r in p.records])
+            i = 0
+            for p in group:
+                p.result = results[i:i + len(p.records)]
+                i += len(p.records)
+        except Exception as e:
+            for p in group:
+                p.error = e
+        for p in group:
+            p.done.set()
+
+    def score(self, records: list) -> list:
+        df = pd.DataFrame.from_records(records).reindex(columns=list(dict.fromkeys(ID_COLS + AMOUNT_COLS)))
+        df = enforce(compute_ratios(enforce(df, AMOUNT_COLS)), RATIO_COLS)
+        proba = positive_proba(self.model, feature_matrix(df, self.meta["features"]))
+        self.stats.add_batch(len(df))
+        threshold = self.meta.get("threshold", 0.5)
+        out = []
+        for rec, p, ratios in zip(records, proba.tolist(), df[RATIO_COLS].to_dict("records")):
+            row = {c: rec[c] for c in ID_COLS if c in rec}
+            row.update(risk_score=round(p, 6), risk_label=int(p >= threshold))
+            row["ratios"] = {c: (None if v != v else round(float(v), 4)) for c, v in ratios.items()}
+            out.append(row)
+        return out
+
+def finite_number(v) -> bool:
+    # bool is an int subclass; json.loads also accepts NaN / Infinity
+    if isinstance(v, bool) or not isinstance(v, (int, float)):
+        return False
+    try:
+        return math.isfinite(v)
+    except OverflowError:       # int beyond float range
+        return False
+
+def validate(payload) -> list:
+    records = payload if isinstance(payload, list) else [payload]
+    if not records or not all(isinstance(r, dict) for r in records):
+        raise ValueError("expected a JSON object or a non-empty list of objects")
+    for r in records:
+        for c in AMOUNT_COLS:
+            v = r.get(c)
+            if v is not None and not finite_number(v):
+                raise ValueError(f"{c} must be a finite number or null, got {v!r}")
+    return records
+
+def make_handler(batcher: MicroBatcher, stats: LatencyStats):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, code: int, body: dict):
+            data = json.dumps(body, ensure_ascii=False).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._send(200, stats.snapshot())
+            elif self.path == "/health":
+                self._send(200, {"status": "ok", "model_version": batcher.meta["version"]})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            t0 = time.perf_counter()
+            if self.path != "/score":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"null")
+                records = validate(payload)
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+                stats.add_request(time.perf_counter() - t0, ok=False)
+                return
+            try:
+                results = batcher.submit(records)
+            except Exception as e:
+                self._send(500, {"error": f"{type(e).__name__}: {e}"})
+                stats.add_request(time.perf_counter() - t0, ok=False)
+                return
+            body = {"model_version": batcher.meta["version"],
+                    "results": results if isinstance(payload, list) else results[0]}
+            self._send(200, body)
+            stats.add_request(time.perf_counter() - t0)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+def make_server(host: str = "127.0.0.1", port: int = 8765, model_path: str = MODEL_DIR,
+                max_batch: int = 64, max_wait_ms: float = 2.0) -> ThreadingHTTPServer:
+    model, meta = load_artifact(model_path)
+    stats = LatencyStats()
+    batcher = MicroBatcher(model, meta, stats, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    server = ThreadingHTTPServer((host, port), make_handler(batcher, stats))
+    server.daemon_threads = True
+    server.batcher = batcher
+    return server
+
+# ==== Localhost load test ====
+
+def _post(url: str, record: dict) -> dict:
+    req = Request(url, data=json.dumps(record).encode(), headers={"Content-Type": "application/json"})
+    with urlopen(req, timeout=30) as r:
+        return json.loads(r.read())
+
+def load_test(server: ThreadingHTTPServer, n_requests: int, concurrency: int) -> dict:
+    host, port = server.server_address[:2]
+    rng = np.random.default_rng(0)
+    records = [
+        {"company_id": f"T{i % 50:03d}", "year": 2024, "quarter": f"Q{i % 4 + 1}",
+         **{c: float(v) for c, v in zip(AMOUNT_COLS, rng.lognormal(25, 1.5, len(AMOUNT_COLS)))}}
+        for i in range(n_requests)
+    ]
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as ex:
+        list(ex.map(lambda r: _post(f"http://{host}:{port}/score", r), records))
+    elapsed = time.perf_counter() - t0
+    with urlopen(f"http://{host}:{port}/metrics") as r:
+        metrics = json.loads(r.read())
+    metrics["throughput_rps"] = round(n_requests / elapsed, 1)
+    return metrics
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--model", default=MODEL_DIR, help="artifact version dir, or model dir (uses LATEST)")
+    ap.add_argument("--max-batch", type=int, default=64)
+    ap.add_argument("--max-wait-ms", type=float, default=2.0)
+    ap.add_argument("--load-test", type=int, default=0, metavar="N",
+                    help="start on a free port, send N concurrent requests, print metrics and exit")
+    ap.add_argument("--concurrency", type=int, default=16)
+    args = ap.parse_args()
+
+    port = 0 if args.load_test else args.port
+    server = make_server(args.host, port, args.model, args.max_batch, args.max_wait_ms)
+    if args.load_test:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(json.dumps(load_test(server, args.load_test, args.concurrency), indent=2))
+        server.shutdown()
+    else:
+        host, port = server.server_address[:2]
+        print(f"[OK] Scoring service on http://{host}:{port}  model={server.batcher.meta['version']}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
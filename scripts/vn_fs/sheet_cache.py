@@ -0,0 +1,198 @@
+import os
+import json
+import hashlib
+import argparse
+import datetime as dt
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+# ==== Raw sheet cache ====
+# Every reader of landing workbooks (bronze_extract, workbook_loader and the
+# clean_* scripts) asks for raw sheets (header=None) through read_raw_sheets.
+# The first time a workbook is seen each requested sheet is parsed once and
+# stored as an Arrow IPC file keyed by the workbook's sha256:
+#   <cache>/<sha[:2]>/<sha>/meta.json      sheet names
+#   <cache>/<sha[:2]>/<sha>/<i>.arrow      sheet i, memory-mapped on read
+# Mixed-type (object) columns are stored as text + a type tag per cell and
+# rebuilt into the same Python values, so callers get exactly the frame
+# pd.read_excel(header=None) would return. VN_FS_SHEET_CACHE overrides the
+# location; set it to "off" to always parse the workbook.
+
+CACHE_DIR = Path(__file__).resolve().parents[2] / "lake" / "cache" / "raw_sheets"
+FORMAT = 1
+
+def cache_dir():
+    env = os.environ.get("VN_FS_SHEET_CACHE")
+    if env is not None and env.strip().lower() in ("", "off", "0", "false"):
+        return None
+    return Path(env) if env else CACHE_DIR
+
+_DIGESTS = {}   # (path, size, mtime_ns) -> sha256
+
+def file_sha256(path) -> str:
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    key = (path, st.st_size, st.st_mtime_ns)
+    if key not in _DIGESTS:
+        h = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+        _DIGESTS[key] = h.hexdigest()
+    return _DIGESTS[key]
+
+# ---- cell encoding for object columns ----
+
+_NAN, _STR, _INT, _FLOAT, _BOOL, _DATETIME, _NONE, _TIME, _TIMESTAMP, _DATE = range(10)
+
+def _encode_cell(v):
+    if v is None:
+        return _NONE, None
+    if isinstance(v, (bool, np.bool_)):
+        return _BOOL, "1" if v else "0"
+    if isinstance(v, (int, np.integer)):
+        return _INT, str(int(v))
+    if isinstance(v, (float, np.floating)):
+        return (_NAN, None) if v != v else (_FLOAT, repr(float(v)))
+    if isinstance(v, str):
+        return _STR, v
+    if isinstance(v, pd.Timestamp):
+        return _TIMESTAMP, v.isoformat()
+    if isinstance(v, dt.datetime):
+        return _DATETIME, v.isoformat()
+    if isinstance(v, dt.time):
+        return _TIME, v.isoformat()
+    if isinstance(v, dt.date):
+        return _DATE, v.isoformat()
+    return _STR, str(v)  # anything exotic degrades to its text
+
+_DECODE = {
+    _NAN: lambda s: np.nan, _STR: lambda s: s, _INT: int, _FLOAT: float, _BOOL: lambda s: s == "1",
+    _DATETIME: dt.datetime.fromisoformat, _NONE: lambda s: None, _TIME: dt.time.fromisoformat,
+    _TIMESTAMP: pd.Timestamp, _DATE: dt.date.fromisoformat,
+}
+
+def encode_frame(df: pd.DataFrame) -> pa.Table:
+    arrays, names, dtypes = [], [], []
+    for i, c in enumerate(df.columns):
+        s = df[c]
+        dtypes.append(str(s.dtype))
+        if s.dtype == object:
+            tags, vals = zip(*map(_encode_cell, s.tolist())) if len(s) else ((), ())
+            arrays += [pa.array(vals, pa.string()), pa.array(tags, pa.int8())]
+            names += [f"{i}", f"{i}#tag"]
+        else:
+            arrays.append(pa.Array.from_pandas(s))
+            names.append(f"{i}")
+    meta = {"columns": [c if isinstance(c, (int, str)) else str(c) for c in df.columns],
+            "dtypes": dtypes, "rows": len(df)}
+    return pa.table(arrays, names=names).replace_schema_metadata({"vn_fs": json.dumps(meta)})
+
+def decode_frame(table: pa.Table) -> pd.DataFrame:
+    meta = json.loads(table.schema.metadata[b"vn_fs"])
+    cols = {}
+    for i, dtype in enumerate(meta["dtypes"]):
+        if dtype == "object":
+            vals = table.column(f"{i}").to_pylist()
+            tags = table.column(f"{i}#tag").to_numpy()
+            cols[i] = pd.Series([_DECODE[t](v) for t, v in zip(tags, vals)], dtype=object)
+        else:
+            cols[i] = table.column(f"{i}").to_pandas().astype(dtype)
+    df = pd.DataFrame(cols, index=pd.RangeIndex(meta["rows"]))
+    df.columns = pd.Index(meta["columns"]) if meta["columns"] else pd.RangeIndex(0)
+    return df
+
+# ---- cache entries ----
+
+def _entry(digest: str, root: Path) -> Path:
+    return root / digest[:2] / digest
+
+def _write_atomic(path: Path, write):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+def _write_sheet(path: Path, df: pd.DataFrame):
+    table = encode_frame(df)
+    def write(tmp):
+        with ipc.new_file(tmp, table.schema) as w:
+            w.write_table(table)
+    _write_atomic(path, write)
+
+def _read_sheet(path: Path) -> pd.DataFrame:
+    with pa.memory_map(str(path)) as src:
+        return decode_frame(ipc.open_file(src).read_all())
+
+def read_raw_sheets(path, sheets=None) -> dict:
+    """{sheet: raw frame (header=None)} for sheet names and/or positions; None = all sheets."""
+    root = cache_dir()
+    if root is None:
+        with pd.ExcelFile(path) as xls:
+            wanted = xls.sheet_names if sheets is None else list(sheets)
+            return {s: xls.parse(s, header=None) for s in wanted}
+
+    entry = _entry(file_sha256(path), root)
+    meta_path = entry / "meta.json"
+    xls = None
+    try:
+        if meta_path.exists():
+            names = json.loads(meta_path.read_text(encoding="utf-8"))["sheet_names"]
+        else:
+            xls = pd.ExcelFile(path)
+            names = xls.sheet_names
+            entry.mkdir(parents=True, exist_ok=True)
+            _write_atomic(meta_path, lambda tmp: tmp.write_text(
+                json.dumps({"format": FORMAT, "source": Path(path).name, "sheet_names": names},
+                           ensure_ascii=False), encoding="utf-8"))
+        wanted = names if sheets is None else list(sheets)
+        out = {}
+        for s in wanted:
+            i = s if isinstance(s, int) else names.index(s) if s in names else None
+            if i is None or not (0 <= i < len(names)):
+                raise ValueError(f"Worksheet {s!r} not found in {path}")
+            sheet_path = entry / f"{i}.arrow"
+            if sheet_path.exists():
+                out[s] = _read_sheet(sheet_path)
+                continue
+            xls = xls or pd.ExcelFile(path)
+            df = xls.parse(names[i], header=None)
+            _write_sheet(sheet_path, df)
+            out[s] = df
+        return out
+    finally:
+        if xls is not None:
+            xls.close()
+
+def read_raw_sheet(path, sheet=0) -> pd.DataFrame:
+    """Same frame as pd.read_excel(path, sheet_name=sheet, header=None)."""
+    return read_raw_sheets(path, [sheet])[sheet]
+
+def sheet_names(path) -> list:
+    root = cache_dir()
+    meta_path = _entry(file_sha256(path), root) / "meta.json" if root else None
+    if meta_path is not None and meta_path.exists():
+        return json.loads(meta_path.read_text(encoding="utf-8"))["sheet_names"]
+    with pd.ExcelFile(path) as xls:
+        return xls.sheet_names
+
+def warm(landing, pattern: str = "*.xls*") -> int:
+    """Pre-convert every workbook under `landing`; returns the number of workbooks."""
+    n = 0
+    for f in sorted(Path(landing).rglob(pattern)):
+        read_raw_sheets(f)
+        n += 1
+    return n
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--warm", default=None, metavar="DIR", help="convert every workbook under DIR")
+    args = ap.parse_args()
+    root = cache_dir()
+    if args.warm:
+        print(f"[OK] Sheet cache warmed: {root}  workbooks={warm(args.warm)}")
+    files = list(root.rglob("*.arrow")) if root and root.exists() else []
+    size = sum(f.stat().st_size for f in files)
+    print(f"[OK] Sheet cache: {root}  sheets={len(files)}  {size / 2**20:.1f} MiB")
@@ -0,0 +1,173 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from schemas import (KEY_COLS, TS_WINDOW, TS_LAG_COLS, TS_GROWTH_COLS, TS_TTM_COLS, TS_VOL_COLS,
+                     TS_SOURCE_COLS, TS_FEATURE_COLS, arrow_schema, enforce)
+from lake import write_dataset, read_dataset, dataset_exists, upsert_partitions
+
+# ==== Time-series features over (company_id, year, quarter) ====
+# Rows are laid out on a complete company x quarter panel (missing quarters
+# become NaN rows), so "previous quarter" is a plain array shift masked at
+# company boundaries. Every feature is one vectorized NumPy expression over the
+# whole panel; there is no per-company Python loop.
+
+# how far back any feature looks: YoY needs t-4, rolling windows t-(W-1)
+LOOKBACK = max(4, TS_WINDOW - 1)
+STATE_NAME = "features_state.parquet"
+
+def period_index(year, quarter) -> np.ndarray:
+    q = pd.Series(quarter).astype(str).str[1:].astype(int).to_numpy()
+    return np.asarray(year, dtype=np.int64) * 4 + (q - 1)
+
+def _panel(df: pd.DataFrame):
+    """Positions of `df` rows on a gap-free per-company quarter grid."""
+    codes = pd.factorize(df["company_id"].astype(str))[0]
+    period = period_index(df["year"], df["quarter"])
+    n_comp = codes.max() + 1 if len(codes) else 0
+    pmin = np.full(n_comp, np.iinfo(np.int64).max)
+    pmax = np.full(n_comp, np.iinfo(np.int64).min)
+    np.minimum.at(pmin, codes, period)
+    np.maximum.at(pmax, codes, period)
+    lengths = pmax - pmin + 1
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]) if n_comp else np.array([], dtype=np.int64)
+    grid_comp = np.repeat(np.arange(n_comp), lengths)
+    pos = starts[codes] + (period - pmin[codes])
+    return pos, grid_comp, int(lengths.sum())
+
+def _lag(arr: np.ndarray, k: int, grid_comp: np.ndarray) -> np.ndarray:
+    out = np.full_like(arr, np.nan)
+    if k < len(arr):
+        out[k:] = arr[:-k]
+        out[k:][grid_comp[k:] != grid_comp[:-k]] = np.nan
+    return out
+
+def _growth(cur: np.ndarray, prev: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        g = (cur - prev) / np.abs(prev)
+    g[~np.isfinite(g)] = np.nan
+    return g
+
+def compute_ts_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Lags, QoQ/YoY growth, TTM sums and rolling volatility for each row of `df`.
+
+    Windows need every quarter present (TTM over 4 missing one quarter is NaN).
+    """
+    pos, grid_comp, size = _panel(df)
+    out = df[[c for c in KEY_COLS + ["exchange"] if c in df.columns]].copy()
+
+    def on_grid(col):
+        arr = np.full(size, np.nan)
+        arr[pos] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        return arr
+
+    grid = {c: on_grid(c) for c in TS_SOURCE_COLS if c in df.columns}
+    lags = {(c, k): _lag(grid[c], k, grid_comp) for c in grid for k in range(1, LOOKBACK + 1)}
+
+    for c in TS_LAG_COLS:
+        out[f"{c}_lag1"] = lags[(c, 1)][pos] if c in grid else np.nan
+    for c in TS_GROWTH_COLS:
+        out[f"{c}_qoq"] = _growth(grid[c], lags[(c, 1)])[pos] if c in grid else np.nan
+        out[f"{c}_yoy"] = _growth(grid[c], lags[(c, 4)])[pos] if c in grid else np.nan
+    for c in TS_TTM_COLS:
+        if c in grid:
+            window = np.vstack([grid[c]] + [lags[(c, k)] for k in range(1, TS_WINDOW)])
+            out[f"{c}_ttm"] = window.sum(axis=0)[pos]
+        else:
+            out[f"{c}_ttm"] = np.nan
+    for c in TS_VOL_COLS:
+        if c in grid:
+            window = np.vstack([grid[c]] + [lags[(c, k)] for k in range(1, TS_WINDOW)])
+            out[f"{c}_vol{TS_WINDOW}"] = window.std(axis=0, ddof=1)[pos]
+        else:
+            out[f"{c}_vol{TS_WINDOW}"] = np.nan
+
+    for c in TS_FEATURE_COLS:
+        if not c.endswith("_ttm"):
+            out[c] = out[c].round(4)
+    return enforce(out)
+
+def _fingerprints(df: pd.DataFrame) -> pd.DataFrame:
+    cols = [c for c in TS_SOURCE_COLS if c in df.columns]
+    fp = df[KEY_COLS + ["exchange"]].copy()
+    fp["row_hash"] = pd.util.hash_pandas_object(df[KEY_COLS + cols], index=False).to_numpy()
+    for c in ["company_id", "quarter", "exchange"]:
+        fp[c] = fp[c].astype("string")
+    return fp.reset_index(drop=True)
+
+def default_state_path(out_dir: str) -> str:
+    return os.path.join(os.path.dirname(os.path.normpath(out_dir)), STATE_NAME)
+
+def _read_silver(silver_dir: str, filters=None) -> pd.DataFrame:
+    return read_dataset(silver_dir, columns=KEY_COLS + ["exchange"] + TS_SOURCE_COLS, filters=filters)
+
+def build_features(silver_dir: str, out_dir: str, state_path: str = None):
+    df = _read_silver(silver_dir)
+    feats = compute_ts_features(df)
+    write_dataset(feats, out_dir, arrow_schema(feats.columns))
+    state_path = state_path or default_state_path(out_dir)
+    Path(state_path).parent.mkdir(parents=True, exist_ok=True)
+    _fingerprints(df).to_parquet(state_path, index=False)
+    print(f"[OK] Features saved: {out_dir}  rows={len(feats)}  features={len(TS_FEATURE_COLS)}")
+
+def build_features_incremental(silver_dir: str, out_dir: str, state_path: str = None):
+    """Recompute only the rows whose windows reach a changed silver row.
+
+    A change at quarter p affects features at p .. p+LOOKBACK of the same
+    company, and computing those needs inputs back to p-LOOKBACK.
+    """
+    state_path = state_path or default_state_path(out_dir)
+    if not (os.path.exists(state_path) and dataset_exists(out_dir)):
+        return build_features(silver_dir, out_dir, state_path)
+
+    fp = _fingerprints(_read_silver(silver_dir))
+    old = pd.read_parquet(state_path)
+    for c in ["company_id", "quarter", "exchange"]:
+        old[c] = old[c].astype("string")
+    m = fp.merge(old, on=KEY_COLS, how="outer", suffixes=("", "_old"), indicator=True)
+    changed = m[(m["_merge"] != "both") | (m["row_hash"] != m["row_hash_old"])]
+    if changed.empty:
+        print(f"[OK] Features up to date: {out_dir}")
+        return
+
+    # earliest changed quarter per company; everything after it within LOOKBACK is stale
+    changed = changed.assign(period=period_index(changed["year"], changed["quarter"]))
+    first = changed.groupby("company_id", observed=True)["period"].min()
+    companies = first.index.astype(str).tolist()
+    src = _read_silver(silver_dir, filters=[("company_id", "in", companies)])
+    src_period = period_index(src["year"], src["quarter"])
+    src_first = src["company_id"].astype(str).map(first.astype("int64")).to_numpy()
+    src = src[src_period >= src_first - LOOKBACK]
+
+    # keep only rows within LOOKBACK quarters after a change
+    n = LOOKBACK + 1
+    affected = pd.MultiIndex.from_arrays([
+        np.repeat(changed["company_id"].astype(str).to_numpy(), n),
+        np.repeat(changed["period"].to_numpy(), n) + np.tile(np.arange(n), len(changed)),
+    ])
+    feats = compute_ts_features(src)
+    rows = pd.MultiIndex.from_arrays([feats["company_id"].astype(str).to_numpy(),
+                                      period_index(feats["year"], feats["quarter"])])
+    feats = feats[rows.isin(affected)]
+
+    deleted = m[m["_merge"] == "right_only"]
+    keys = pd.concat([
+        feats[KEY_COLS + ["exchange"]],
+        deleted[KEY_COLS + ["exchange_old"]].rename(columns={"exchange_old": "exchange"}),
+    ], ignore_index=True)
+    partitions = upsert_partitions(out_dir, arrow_schema(feats.columns), feats, keys)
+    fp.to_parquet(state_path, index=False)
+    print(f"[OK] Features (incremental) saved: {out_dir}  recomputed={len(feats)}  "
+          f"companies={len(companies)}  partitions={partitions}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--incremental", action="store_true",
+                    help="recompute only the tail windows touched by changed silver rows")
+    args = ap.parse_args()
+    build = build_features_incremental if args.incremental else build_features
+    build(
+        silver_dir="../../lake/silver/vn_fs/financials_quarterly",
+        out_dir="../../lake/silver/vn_fs/features_quarterly",
+    )
@@ -0,0 +1,187 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from schemas import (KEY_COLS, PEER_COLS, PEER_QUANTILES, PEER_FEATURE_COLS, arrow_schema, enforce)
+from lake import write_dataset, read_dataset, dataset_exists, upsert_partitions
+
+# ==== Industry peer aggregates & peer-relative features ====
+# Peer group = (industry, year, quarter), industry from company_list.csv.
+# The aggregate table keeps, per group and ratio, the member count, mean/std
+# and the quantile grid p00..p100 (median = p50). A silver row's percentile
+# rank is its position on its group's grid (linear interpolation) and its
+# z-score is robust: (x - p50) / (IQR / 1.349). Both come from one join of the
+# rows onto the aggregate table, so scoring never needs the other members.
+# Incremental runs recompute only the groups that contain a changed row.
+
+SILVER_PATH = "../../lake/silver/vn_fs/financials_quarterly"
+PEERS_PATH = "../../lake/silver/vn_fs/peer_features_quarterly"
+AGG_PATH = "../../lake/silver/vn_fs/peer_aggregates_quarterly.parquet"
+COMPANY_LIST = "company_list.csv"
+STATE_NAME = "peers_state.parquet"
+
+GROUP_COLS = ["industry", "year", "quarter"]
+PEER_MIN_COUNT = 3          # smaller groups get aggregates but no features
+IQR_TO_SIGMA = 1.349
+
+def q_name(p: float) -> str:
+    return f"p{round(p * 100):02d}"
+
+def company_industry(df: pd.DataFrame, comp: pd.DataFrame) -> pd.Series:
+    """industry per row of `df`, looked up by company_id in company_list (NaN if unknown)."""
+    key = "symbol" if "symbol" in comp.columns else "company_id"
+    if "industry" not in comp.columns:
+        return pd.Series(np.nan, index=df.index, dtype=object)
+    lookup = comp.drop_duplicates(key).set_index(key)["industry"]
+    return df["company_id"].astype(str).map(lookup)
+
+def _read_silver(silver_dir: str, comp: pd.DataFrame, filters=None) -> pd.DataFrame:
+    df = read_dataset(silver_dir, columns=KEY_COLS + ["exchange"] + PEER_COLS, filters=filters)
+    df["industry"] = company_industry(df, comp).astype("string")
+    return df
+
+def _group_index(df: pd.DataFrame) -> pd.MultiIndex:
+    return pd.MultiIndex.from_arrays([df["industry"].astype("string"), df["year"].astype(int),
+                                      df["quarter"].astype(str)], names=GROUP_COLS)
+
+def peer_aggregates(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per (industry, year, quarter): {ratio}_n/_mean/_std and the {ratio}_pXX grid."""
+    df = df[df["industry"].notna()]
+    vals = df[PEER_COLS].astype(float)
+    keys = _group_index(df)
+    g = vals.groupby([keys.get_level_values(i) for i in range(keys.nlevels)], sort=True)
+    stats = g.agg(["count", "mean", "std"])
+    stats.columns = [f"{c}_{s.replace('count', 'n')}" for c, s in stats.columns]
+    quant = g.quantile(PEER_QUANTILES).unstack(level=-1)
+    quant.columns = [f"{c}_{q_name(p)}" for c, p in quant.columns]
+    cols = [f"{c}_{s}" for c in PEER_COLS for s in ["n", "mean", "std"] + [q_name(p) for p in PEER_QUANTILES]]
+    out = pd.concat([stats, quant], axis=1).reindex(columns=cols).reset_index()
+    return enforce(out, ["industry", "quarter"])
+
+def grid_rank(x: np.ndarray, grid: np.ndarray, probs) -> np.ndarray:
+    """Percentile of each x[i] on its own ascending quantile grid[i] (linear in between)."""
+    probs = np.asarray(probs, dtype=float)
+    k = grid.shape[1]
+    rows = np.arange(len(x))
+    with np.errstate(invalid="ignore"):
+        j = (grid <= x[:, None]).sum(axis=1)            # grid points at or below x
+        lo, hi = np.clip(j - 1, 0, k - 1), np.clip(j, 0, k - 1)
+        qlo, qhi = grid[rows, lo], grid[rows, hi]
+        frac = np.where(qhi > qlo, (x - qlo) / (qhi - qlo), 0.0)
+        pct = probs[lo] + np.clip(frac, 0.0, 1.0) * (probs[hi] - probs[lo])
+    pct = np.where(j == 0, 0.0, np.where(j == k, 1.0, pct))
+    pct[np.isnan(x) | np.isnan(grid).any(axis=1)] = np.nan
+    return pct
+
+def peer_features(df: pd.DataFrame, aggs: pd.DataFrame) -> pd.DataFrame:
+    """{ratio}_peer_pct and {ratio}_peer_z for every row of `df` via one join on the group key."""
+    out = df[KEY_COLS + ["exchange"]].copy()
+    joined = aggs.set_index(_group_index(aggs)).reindex(_group_index(df))
+    for c in PEER_COLS:
+        x = df[c].to_numpy(dtype=float, na_value=np.nan)
+        grid = joined[[f"{c}_{q_name(p)}" for p in PEER_QUANTILES]].to_numpy(dtype=float)
+        ok = joined[f"{c}_n"].to_numpy(dtype=float) >= PEER_MIN_COUNT
+        pct = grid_rank(x, grid, PEER_QUANTILES)
+        scale = (joined[f"{c}_p75"] - joined[f"{c}_p25"]).to_numpy(dtype=float) / IQR_TO_SIGMA
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = (x - joined[f"{c}_p50"].to_numpy(dtype=float)) / scale
+        z[~np.isfinite(z)] = np.nan
+        out[f"{c}_peer_pct"] = np.where(ok, pct, np.nan).round(4)
+        out[f"{c}_peer_z"] = np.where(ok, z, np.nan).round(4)
+    return enforce(out)
+
+def _fingerprints(df: pd.DataFrame) -> pd.DataFrame:
+    fp = df[KEY_COLS + ["exchange", "industry"]].copy()
+    fp["row_hash"] = pd.util.hash_pandas_object(df[KEY_COLS + ["industry"] + PEER_COLS], index=False).to_numpy()
+    for c in ["company_id", "quarter", "exchange", "industry"]:
+        fp[c] = fp[c].astype("string")
+    return fp.reset_index(drop=True)
+
+def default_state_path(out_dir: str) -> str:
+    return os.path.join(os.path.dirname(os.path.normpath(out_dir)), STATE_NAME)
+
+def _save_aggs(aggs: pd.DataFrame, agg_path: str):
+    Path(agg_path).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f"{agg_path}.tmp"
+    aggs.to_parquet(tmp, index=False)
+    os.replace(tmp, agg_path)
+
+def build_peers(silver_dir: str, company_list_csv: str, out_dir: str, agg_path: str, state_path: str = None):
+    comp = pd.read_csv(company_list_csv)
+    df = _read_silver(silver_dir, comp)
+    aggs = peer_aggregates(df)
+    feats = peer_features(df, aggs)
+    _save_aggs(aggs, agg_path)
+    write_dataset(feats, out_dir, arrow_schema(feats.columns))
+    state_path = state_path or default_state_path(out_dir)
+    _fingerprints(df).to_parquet(state_path, index=False)
+    print(f"[OK] Peer aggregates saved: {agg_path}  groups={len(aggs)}")
+    print(f"[OK] Peer features saved: {out_dir}  rows={len(feats)}  features={len(PEER_FEATURE_COLS)}")
+
+def build_peers_incremental(silver_dir: str, company_list_csv: str, out_dir: str, agg_path: str,
+                            state_path: str = None):
+    """Recompute aggregates and features only for the peer groups holding a changed row.
+
+    A row changes when its ratios change, it is added or removed, or its
+    company moves to another industry (both the old and new group are stale).
+    """
+    state_path = state_path or default_state_path(out_dir)
+    if not (os.path.exists(state_path) and os.path.exists(agg_path) and dataset_exists(out_dir)):
+        return build_peers(silver_dir, company_list_csv, out_dir, agg_path, state_path)
+
+    comp = pd.read_csv(company_list_csv)
+    fp = _fingerprints(_read_silver(silver_dir, comp))
+    old = pd.read_parquet(state_path)
+    for c in ["company_id", "quarter", "exchange", "industry"]:
+        old[c] = old[c].astype("string")
+    m = fp.merge(old, on=KEY_COLS, how="outer", suffixes=("", "_old"), indicator=True)
+    changed = m[(m["_merge"] != "both") | (m["row_hash"] != m["row_hash_old"])]
+    if changed.empty:
+        print(f"[OK] Peers up to date: {out_dir}")
+        return
+
+    stale = pd.concat([changed[GROUP_COLS], changed[["industry_old", "year", "quarter"]]
+                       .rename(columns={"industry_old": "industry"})]).dropna().drop_duplicates()
+    stale_groups = _group_index(stale)
+    years = sorted(int(y) for y in changed["year"].unique())
+    src = _read_silver(silver_dir, comp, filters=[("year", "in", years)])
+    in_stale = _group_index(src).isin(stale_groups)
+
+    aggs = pd.read_parquet(agg_path)
+    aggs = aggs[~_group_index(aggs).isin(stale_groups)]
+    fresh = peer_aggregates(src[in_stale])
+    aggs = pd.concat([aggs, fresh], ignore_index=True).sort_values(GROUP_COLS, ignore_index=True)
+    aggs = enforce(aggs, ["industry", "quarter"])
+
+    # members of stale groups get new ranks; changed rows now outside any group lose theirs
+    changed_keys = pd.MultiIndex.from_arrays([changed["company_id"].astype(str), changed["year"].astype(int),
+                                              changed["quarter"].astype(str)])
+    src_keys = pd.MultiIndex.from_arrays([src["company_id"].astype(str), src["year"].astype(int),
+                                          src["quarter"].astype(str)])
+    feats = peer_features(src[in_stale | src_keys.isin(changed_keys)], aggs)
+
+    deleted = m[m["_merge"] == "right_only"]
+    keys = pd.concat([
+        feats[KEY_COLS + ["exchange"]],
+        deleted[KEY_COLS + ["exchange_old"]].rename(columns={"exchange_old": "exchange"}),
+    ], ignore_index=True)
+    _save_aggs(aggs, agg_path)
+    partitions = upsert_partitions(out_dir, arrow_schema(feats.columns), feats, keys)
+    fp.to_parquet(state_path, index=False)
+    print(f"[OK] Peers (incremental) saved: {out_dir}  groups={len(fresh)}  recomputed={len(feats)}  "
+          f"partitions={partitions}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--incremental", action="store_true",
+                    help="recompute only the peer groups that contain changed silver rows")
+    ap.add_argument("--company-list", default=COMPANY_LIST)
+    args = ap.parse_args()
+    build = build_peers_incremental if args.incremental else build_peers
+    build(
+        silver_dir=SILVER_PATH,
+        company_list_csv=args.company_list,
+        out_dir=PEERS_PATH,
+        agg_path=AGG_PATH,
+    )
@@ -1,57 +1,245 @@
 
 import os
+import time
+import argparse
+import itertools
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from schemas import KEY_COLS, INTERMEDIATE_COLS, RATIO_COLS, arrow_schema, enforce, memory_report
+from ratios import RATIO_DECIMALS, with_ratios
+from lake import (write_dataset, read_dataset, dataset_exists,
+                  upsert_partitions, export_csv, iter_batches, write_batches)
+from run_report import RunReport, add_report_args
 
 def compute_ratios(df: pd.DataFrame) -> pd.DataFrame:
-    eps = 1e-9
-    if "expenses" not in df.columns:
-        df["expenses"] = df[["cogs","opex"]].sum(axis=1, min_count=1)
-    if "operating_profit" not in df.columns:
-        df["operating_profit"] = (df["revenue"] - df["expenses"]).where(df["revenue"].notna() & df["expenses"].notna())
-
-    if "debt_total" not in df.columns:
-        df["debt_total"] = df[["short_term_debt","long_term_debt"]].sum(axis=1, min_count=1)
-    if "current_assets" not in df.columns:
-        df["current_assets"] = pd.NA
-    if "current_liabilities" not in df.columns:
-        df["current_liabilities"] = df["short_term_debt"]
-
-    df["roe"] = df["net_profit"] / (df["equity"] + eps)
-    df["roa"] = df["net_profit"] / (df["total_assets"] + eps)
-    df["debt_to_equity"] = df["debt_total"] / (df["equity"] + eps)
-    df["current_ratio"] = df["current_assets"] / (df["current_liabilities"] + eps)
-    df["interest_coverage"] = df["operating_profit"] / (df["interest_expense"] + eps)
-    df["net_margin"] = df["net_profit"] / (df["revenue"] + eps)
-
-    for c in ["roe","roa","debt_to_equity","current_ratio","interest_coverage","net_margin"]:
-        df[c] = df[c].astype(float).round(4)
-    return df
-
-def silver_transform(bronze_csv: str, out_parquet: str, out_csv: str):
-    if not os.path.exists(bronze_csv):
-        raise FileNotFoundError(f"Bronze CSV not found: {bronze_csv}")
-    df = pd.read_csv(bronze_csv)
-
-    df["company_id"] = df["company_id"].astype("string")
-    df["year"] = df["year"].astype(int)
-    df["quarter"] = df["quarter"].astype("string")
-
-    num_cols = [c for c in df.columns if c not in ["company_id","year","quarter"]]
-    for c in num_cols:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
-
-    df = compute_ratios(df)
-    df = df.sort_values(["company_id","year","quarter"])
-
-    Path(os.path.dirname(out_parquet)).mkdir(parents=True, exist_ok=True)
-    df.to_parquet(out_parquet, index=False)
-    df.to_csv(out_csv, index=False)
-    print(f"[OK] Silver saved: {out_csv}  rows={len(df)}")
+    """`df` plus the silver intermediates and RATIO_COLS from the ratio registry (input left untouched)."""
+    return with_ratios(df, INTERMEDIATE_COLS + RATIO_COLS, decimals=RATIO_DECIMALS)
+
+def load_bronze(bronze_path: str) -> pd.DataFrame:
+    if not os.path.exists(bronze_path):
+        raise FileNotFoundError(f"Bronze not found: {bronze_path}")
+    if str(bronze_path).endswith(".csv"):
+        return pd.read_csv(bronze_path)
+    return read_dataset(bronze_path)
+
+def prepare_bronze(df: pd.DataFrame) -> pd.DataFrame:
+    # registry dtypes: categorical ids, int16 year, numeric coercion elsewhere
+    return enforce(df)
+
+def build_silver(bronze_path: str) -> pd.DataFrame:
+    df = prepare_bronze(load_bronze(bronze_path))
+    df = enforce(compute_ratios(df))
+    return df.sort_values(["company_id","year","quarter"])
+
+def silver_transform(bronze_path: str, out_dir: str, out_csv: str = None, state_path: str = None,
+                     mem_report: bool = False, report: RunReport = None):
+    report = report or RunReport("silver")
+    with report.stage("read_bronze") as st:
+        df = prepare_bronze(load_bronze(bronze_path))
+        fp = bronze_fingerprints(df)
+        st["rows"] = len(df)
+    with report.stage("compute_ratios", rows=len(df)):
+        df = enforce(compute_ratios(df))
+        df = df.sort_values(["company_id","year","quarter"])
+    if mem_report:
+        memory_report(df, "silver")
+
+    with report.stage("write", rows=len(df)):
+        write_dataset(df, out_dir, arrow_schema(df.columns))
+        save_state(fp, state_path or default_state_path(out_dir))
+        if out_csv:
+            export_csv(df, out_csv)
+    print(f"[OK] Silver saved: {out_dir}  rows={len(df)}")
+
+# ==== Streaming mode ====
+# Bronze is read in record batches and each batch goes through the same
+# prepare_bronze/compute_ratios as the in-memory path before being appended
+# to the silver dataset writer, so peak memory follows batch_size rather than
+# the size of bronze. compute_ratios is row-wise, so the rows are identical.
+
+def iter_bronze(bronze_path: str, batch_size: int):
+    if not os.path.exists(bronze_path):
+        raise FileNotFoundError(f"Bronze not found: {bronze_path}")
+    if str(bronze_path).endswith(".csv"):
+        yield from pd.read_csv(bronze_path, chunksize=batch_size)
+    else:
+        yield from iter_batches(bronze_path, batch_size=batch_size)
+
+def silver_columns(bronze_cols) -> list:
+    return list(compute_ratios(prepare_bronze(pd.DataFrame(columns=list(bronze_cols)))).columns)
+
+def silver_transform_streaming(bronze_path: str, out_dir: str, out_csv: str = None,
+                               state_path: str = None, batch_size: int = 50_000, report: RunReport = None):
+    report = report or RunReport("silver")
+    batches = iter_bronze(bronze_path, batch_size)
+    first = next(batches, None)
+    if first is None:
+        print(f"[WARN] Bronze is empty: {bronze_path}")
+        if out_csv and os.path.exists(out_csv):
+            # don't leave an export of the previous bronze behind
+            os.remove(out_csv)
+            print(f"[WARN] Removed stale CSV export: {out_csv}")
+        return
+    schema = arrow_schema(silver_columns(first.columns))
+    fps = []
+    stats = {"rows": 0, "batches": 0}
+    # the CSV is built next to the target and swapped in once the dataset is written
+    tmp_csv = f"{out_csv}.tmp" if out_csv else None
+    if out_csv:
+        Path(out_csv).parent.mkdir(parents=True, exist_ok=True)
+
+    compute_s = 0.0
+
+    def frames():
+        nonlocal compute_s
+        for i, df in enumerate(itertools.chain([first], batches)):
+            t0 = time.perf_counter()
+            df = prepare_bronze(df)
+            fps.append(bronze_fingerprints(df))
+            df = enforce(compute_ratios(df))
+            compute_s += time.perf_counter() - t0
+            if out_csv:
+                # CSV rows follow partition order, not a global sort
+                df.to_csv(tmp_csv, index=False, mode="w" if i == 0 else "a", header=(i == 0))
+            stats["rows"] += len(df)
+            stats["batches"] += 1
+            yield df
+
+    # read, compute and write interleave batch by batch: one stage, compute time broken out
+    try:
+        with report.stage("stream") as st:
+            write_batches(frames(), out_dir, schema)
+            if out_csv:
+                os.replace(tmp_csv, out_csv)
+            save_state(pd.concat(fps, ignore_index=True), state_path or default_state_path(out_dir))
+            st.update(rows=stats["rows"], batches=stats["batches"], compute_ratios_s=round(compute_s, 4))
+    finally:
+        if tmp_csv and os.path.exists(tmp_csv):
+            os.remove(tmp_csv)
+    print(f"[OK] Silver (streaming) saved: {out_dir}  rows={stats['rows']}  batches={stats['batches']}")
+
+# ==== Incremental mode ====
+# The watermark is a per-key fingerprint of the bronze row each silver row was
+# built from. A later run hashes bronze again (vectorized), recomputes ratios
+# only for new/changed keys and upserts them into the partitions they live in.
+
+STATE_NAME = "silver_state.parquet"
+
+def default_state_path(out_dir: str) -> str:
+    return os.path.join(os.path.dirname(os.path.normpath(out_dir)), STATE_NAME)
+
+def bronze_fingerprints(df: pd.DataFrame) -> pd.DataFrame:
+    # call on the prepared bronze frame, before compute_ratios adds columns
+    fp = df[KEY_COLS + ["exchange"]].copy() if "exchange" in df.columns else df[KEY_COLS].assign(exchange=pd.NA)
+    fp["row_hash"] = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return fp.reset_index(drop=True)
+
+def save_state(fp: pd.DataFrame, state_path: str):
+    Path(state_path).parent.mkdir(parents=True, exist_ok=True)
+    fp.to_parquet(state_path, index=False)
+
+def silver_transform_incremental(bronze_path: str, out_dir: str, out_csv: str = None, state_path: str = None,
+                                 report: RunReport = None):
+    report = report or RunReport("silver")
+    state_path = state_path or default_state_path(out_dir)
+    if not (os.path.exists(state_path) and dataset_exists(out_dir)):
+        print("[INFO] No silver watermark yet, running a full build")
+        return silver_transform(bronze_path, out_dir, out_csv, state_path, report=report)
+
+    with report.stage("diff") as st:
+        bronze = prepare_bronze(load_bronze(bronze_path))
+        fp = bronze_fingerprints(bronze)
+        old = pd.read_parquet(state_path)
+        for c in ["company_id","quarter","exchange"]:
+            fp[c] = fp[c].astype("string")
+            old[c] = old[c].astype("string")
+        m = fp.merge(old, on=KEY_COLS, how="outer", suffixes=("", "_old"), indicator=True)
+        st["rows"] = len(bronze)
+
+    changed = m[(m["_merge"] == "left_only") | ((m["_merge"] == "both") & (m["row_hash"] != m["row_hash_old"]))]
+    deleted = m[m["_merge"] == "right_only"]
+    moved = changed[changed["exchange_old"].notna() & (changed["exchange_old"] != changed["exchange"])]
+    if changed.empty and deleted.empty:
+        print(f"[OK] Silver up to date: {out_dir}")
+        return
+
+    keys = pd.concat([
+        changed[KEY_COLS + ["exchange"]],
+        deleted[KEY_COLS + ["exchange_old"]].rename(columns={"exchange_old": "exchange"}),
+        moved[KEY_COLS + ["exchange_old"]].rename(columns={"exchange_old": "exchange"}),
+    ], ignore_index=True)
+
+    wanted = pd.MultiIndex.from_frame(changed[KEY_COLS].astype({"year": int}))
+    have = pd.MultiIndex.from_arrays([bronze["company_id"].astype(str), bronze["year"], bronze["quarter"].astype(str)])
+    with report.stage("compute_ratios") as st:
+        rows = enforce(compute_ratios(bronze[have.isin(wanted)]))
+        st["rows"] = len(rows)
+
+    with report.stage("write", rows=len(rows)) as st:
+        partitions = upsert_partitions(out_dir, arrow_schema(rows.columns), rows, keys)
+        save_state(fp, state_path)
+        if out_csv:
+            export_csv(read_dataset(out_dir).sort_values(KEY_COLS), out_csv)
+        st["partitions"] = partitions
+    print(f"[OK] Silver (incremental) saved: {out_dir}  upserted={len(rows)}  "
+          f"deleted={len(deleted)}  partitions={partitions}")
+
+def verify_silver(bronze_path: str, out_dir: str, atol: float = 0.0) -> pd.DataFrame:
+    """Full in-memory rebuild compared with the stored silver; returns mismatching keys."""
+    expected = build_silver(bronze_path)
+    stored = read_dataset(out_dir)
+    for d in (expected, stored):
+        for c in ["company_id","quarter","exchange"]:
+            if c in d.columns:
+                d[c] = d[c].astype(str)
+    cols = [c for c in expected.columns if c in stored.columns]
+    m = expected[cols].merge(stored[cols], on=KEY_COLS, how="outer", suffixes=("", "_stored"), indicator=True)
+    bad = m["_merge"] != "both"
+    for c in cols:
+        if c in KEY_COLS:
+            continue
+        a, b = m[c], m[f"{c}_stored"]
+        if pd.api.types.is_numeric_dtype(a):
+            same = np.isclose(a.astype(float), b.astype(float), rtol=0.0, atol=atol, equal_nan=True)
+        else:
+            same = (a == b) | (a.isna() & b.isna())
+        bad |= ~np.asarray(same, dtype=bool)
+    mismatches = m.loc[bad, KEY_COLS + ["_merge"]]
+    print(f"[{'OK' if mismatches.empty else 'WARN'}] Silver verify: rows={len(expected)}  mismatches={len(mismatches)}")
+    return mismatches
 
 if __name__ == "__main__":
-    silver_transform(
-        bronze_csv="../../lake/bronze/vn_fs/bronze_financials_quarterly.csv",
-        out_parquet="../../lake/silver/vn_fs/silver_financials_quarterly.parquet",
-        out_csv="../../lake/silver/vn_fs/silver_financials_quarterly.csv"
-    )
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv", action="store_true", help="also export a flat silver CSV")
+    ap.add_argument("--incremental", action="store_true",
+                    help="recompute only bronze keys changed since the last silver build")
+    ap.add_argument("--verify", action="store_true", help="compare stored silver with a full rebuild")
+    ap.add_argument("--mem-report", action="store_true", help="print per-column memory use")
+    ap.add_argument("--batch-size", type=int, default=None,
+                    help="stream bronze in batches of this many rows (bounded memory)")
+    add_report_args(ap)
+    args = ap.parse_args()
+    report = RunReport("silver", args.report, args.profile)
+    bronze_path = "../../lake/bronze/vn_fs/financials_quarterly"
+    out_dir = "../../lake/silver/vn_fs/financials_quarterly"
+    if args.verify:
+        verify_silver(bronze_path, out_dir)
+    elif args.batch_size:
+        silver_transform_streaming(
+            bronze_path=bronze_path,
+            out_dir=out_dir,
+            out_csv="../../lake/silver/vn_fs/silver_financials_quarterly.csv" if args.csv else None,
+            batch_size=args.batch_size,
+            report=report,
+        )
+    else:
+        out_csv = "../../lake/silver/vn_fs/silver_financials_quarterly.csv" if args.csv else None
+        if args.incremental:
+            silver_transform_incremental(bronze_path=bronze_path, out_dir=out_dir, out_csv=out_csv,
+                                         report=report)
+        else:
+            silver_transform(bronze_path=bronze_path, out_dir=out_dir, out_csv=out_csv,
+                             mem_report=args.mem_report, report=report)
+    if args.report:
+        report.save()
@@ -0,0 +1,202 @@
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from openpyxl import Workbook
+from schemas import AMOUNT_COLS, ID_COLS
+
+# ==== Synthetic landing data ====
+# Writes a landing tree shaped like the real downloads, for N companies x Y years:
+#   <root>/data/landing/<EX>/<SYM>/<year>/Q{1..4}_{kqkd,cdkt,lctt}.xlsx   (bronze_extract)
+#   <root>/data/landing/<EX>/<SYM>/<year>/<SYM>_<year>.xlsx              (aggreat_all, clean_one_company)
+#   <root>/data/landing/<EX>/<SYM>/<SYM>_<y0>_<y1>.xlsx                  (clean_company_multi_year)
+#   <root>/company_list.csv, <root>/truth_quarterly.csv (expected bronze rows in VND)
+# Quarterly sheets state their unit as "triệu đồng" or "tỷ đồng" (mixed per
+# file) and format cells as plain numbers, "1,234,567" / "1.234.567" strings and
+# accounting negatives "(1,234)". The prior-period column only holds text
+# ("1,234"; amounts under 1,000 are left blank), so pick_value_column settles
+# on the current-period column.
+
+FIXTURE_VERSION = 3         # bump when the generated files change, so cached trees are rebuilt
+EXCHANGES = ["HOSE", "HNX", "UPCOM"]
+INDUSTRIES = ["Food & Beverage", "IT Services", "Retail", "Banking", "Construction Materials", "Real Estate"]
+SCALES = {"triệu đồng": 1_000_000, "tỷ đồng": 1_000_000_000}
+
+# one label per amount column, matched by bronze_extract.KEY_MAP; noise rows match nothing
+QUARTER_LABELS = {
+    "kqkd": [("revenue", "1. Doanh thu bán hàng và cung cấp dịch vụ"), (None, "Các khoản giảm trừ"),
+             ("cogs", "4. Giá vốn hàng bán"), (None, "Lợi nhuận gộp về bán hàng"),
+             ("interest_expense", "Trong đó: Chi phí lãi vay"), ("opex", "Chi phí bán hàng"),
+             (None, "Thu nhập khác"), ("net_profit", "LỢI NHUẬN SAU THUẾ TNDN"),
+             (None, "Lãi cơ bản trên cổ phiếu")],
+    "cdkt": [(None, "Tiền và các khoản tương đương tiền"), (None, "Hàng tồn kho"),
+             ("total_assets", "TỔNG TÀI SẢN"), ("short_term_debt", "I. Nợ ngắn hạn"),
+             ("long_term_debt", "II. Nợ dài hạn"), ("equity", "D. VỐN CHỦ SỞ HỮU"),
+             (None, "Lợi ích cổ đông không kiểm soát")],
+    "lctt": [(None, "Khấu hao TSCĐ"), ("cashflow_ops", "Lưu chuyển tiền từ hoạt động kinh doanh"),
+             (None, "Tiền chi trả lãi vay")],
+}
+
+# clean_* labels (get_value keywords) -> how to derive the annual value
+ANNUAL_LABELS = {
+    "CÂN ĐỐI KẾ TOÁN": [("Tài sản ngắn hạn", "current_assets"),
+                        ("Tiền và các khoản tương đương tiền", "cash_and_equivalents"),
+                        ("Tổng cộng tài sản", "total_assets"), ("Nợ phải trả", "total_liabilities"),
+                        ("Nợ ngắn hạn", "short_term_debt"),
+                        ("Vay và nợ thuê tài chính ngắn hạn", "st_borrowings"),
+                        ("Vay và nợ thuê tài chính dài hạn", "lt_borrowings"),
+                        ("Vốn chủ sở hữu", "equity")],
+    "KẾT QUẢ KINH DOANH": [("Doanh thu bán hàng và cung cấp dịch vụ", "revenue"),
+                           ("Lợi nhuận gộp về bán hàng và cung cấp dịch vụ", "gross_profit"),
+                           ("Chi phí tài chính", "interest_expense"), ("Chi phí bán hàng", "selling"),
+                           ("Chi phí quản lý doanh nghiệp", "admin"),
+                           ("Lợi nhuận sau thuế thu nhập doanh nghiệp", "net_profit")],
+    "LƯU CHUYỂN TIỀN TỆ": [("Lưu chuyển tiền thuần từ hoạt động kinh doanh", "cashflow_ops"),
+                           ("Lưu chuyển tiền thuần từ hoạt động đầu tư", "cashflow_investing"),
+                           ("Lưu chuyển tiền thuần từ hoạt động tài chính", "cashflow_financing")],
+}
+
+def company_list(n_companies: int, rng) -> pd.DataFrame:
+    symbols = [f"S{i:03d}" if n_companies > 676 else chr(65 + i // 26) + chr(65 + i % 26) + "X"
+               for i in range(n_companies)]
+    return pd.DataFrame({
+        "symbol": symbols,
+        "exchange": rng.choice(EXCHANGES, n_companies, p=[0.5, 0.3, 0.2]),
+        "industry": rng.choice(INDUSTRIES, n_companies),
+    })
+
+def simulate_quarters(comp: pd.DataFrame, years, rng) -> pd.DataFrame:
+    """Quarterly statement values in VND, one row per (company, year, quarter)."""
+    periods = [(y, f"Q{q}") for y in years for q in range(1, 5)]
+    n, t = len(comp), len(periods)
+    size = rng.lognormal(27, 1.2, n)[:, None]                       # total assets ~ 5e11 VND
+    walk = np.exp(np.cumsum(rng.normal(0.01, 0.04, (n, t)), axis=1))
+    assets = size * walk
+    revenue = assets * rng.uniform(0.05, 0.4, (n, 1)) * rng.normal(1, 0.1, (n, t)).clip(0.5)
+    cogs = revenue * rng.uniform(0.55, 0.9, (n, 1))
+    opex = revenue * rng.uniform(0.03, 0.15, (n, 1))
+    lev = rng.uniform(0.1, 0.8, (n, 1))
+    std = assets * lev * rng.uniform(0.4, 0.8, (n, 1))
+    ltd = assets * lev - std
+    equity = assets - std - ltd
+    interest = (std + ltd) * rng.uniform(0.01, 0.03, (n, 1))
+    net = (revenue - cogs - opex - interest) * 0.8 + rng.normal(0, 0.02, (n, t)) * revenue
+    cfo = net * rng.normal(1, 0.8, (n, t))
+    vals = dict(revenue=revenue, cogs=cogs, opex=opex, net_profit=net, total_assets=assets, equity=equity,
+                short_term_debt=std, long_term_debt=ltd, cashflow_ops=cfo, interest_expense=interest)
+    df = pd.DataFrame({
+        "company_id": np.repeat(comp["symbol"].to_numpy(), t),
+        "exchange": np.repeat(comp["exchange"].to_numpy(), t),
+        "year": np.tile([p[0] for p in periods], n),
+        "quarter": np.tile([p[1] for p in periods], n),
+    })
+    for c in AMOUNT_COLS:
+        df[c] = vals[c].ravel()
+    return df
+
+def fmt_cell(v: int, rng):
+    """Number as it shows up in exported statements."""
+    r = rng.random()
+    if v < 0:
+        return f"({-v:,})" if r < 0.7 else int(v)
+    if r < 0.6:
+        return int(v)
+    if r < 0.8:
+        return f"{v:,}"
+    return f"{v:,}".replace(",", ".")
+
+def _write_rows(path: Path, rows, sheet: str = "Sheet1"):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet)
+    for r in rows:
+        ws.append(r)
+    wb.save(path)
+
+def write_quarter_files(base: Path, rec: dict, rng) -> dict:
+    """Q*_kqkd/cdkt/lctt.xlsx for one company-quarter; returns the values bronze should read (VND)."""
+    truth = {}
+    for stmt, labels in QUARTER_LABELS.items():
+        unit = rng.choice(list(SCALES))
+        scale = SCALES[unit]
+        rows = [[f"BÁO CÁO {stmt.upper()} - {rec['company_id']}", None, None],
+                [f"Đơn vị: {unit}", None, None],
+                ["Chỉ tiêu", f"{rec['quarter']}/{rec['year']}", "Kỳ trước"]]
+        for col, label in labels:
+            amount = rec[col] if col else rng.lognormal(24, 1.5)
+            units = int(round(amount / scale))
+            prior = int(round(units * rng.uniform(0.8, 1.2)))
+            rows.append([label, fmt_cell(units, rng), f"{prior:,}" if abs(prior) >= 1000 else None])
+            if col:
+                truth[col] = float(units * scale)
+        _write_rows(base / f"{rec['quarter']}_{stmt}.xlsx", rows)
+    return truth
+
+def annual_values(q: pd.DataFrame) -> dict:
+    """Annual clean_* items from the four quarters of one year (flows summed, stocks at Q4)."""
+    last = q.iloc[-1]
+    s = lambda c: q[c].sum()
+    return {
+        "current_assets": last["total_assets"] * 0.55, "cash_and_equivalents": last["total_assets"] * 0.08,
+        "total_assets": last["total_assets"], "total_liabilities": last["short_term_debt"] + last["long_term_debt"],
+        "short_term_debt": last["short_term_debt"], "st_borrowings": last["short_term_debt"] * 0.6,
+        "lt_borrowings": last["long_term_debt"] * 0.9, "equity": last["equity"],
+        "revenue": s("revenue"), "gross_profit": s("revenue") - s("cogs"), "interest_expense": s("interest_expense"),
+        "selling": s("opex") * 0.6, "admin": s("opex") * 0.4, "net_profit": s("net_profit"),
+        "cashflow_ops": s("cashflow_ops"), "cashflow_investing": -0.3 * abs(s("cashflow_ops")),
+        "cashflow_financing": -0.2 * s("net_profit"),
+    }
+
+def write_workbook(path: Path, years, annual: dict, rng, header_offset: int = 0):
+    """Three-sheet workbook; header row ("Chỉ tiêu", "Năm/2023", ...) after `header_offset` title rows."""
+    wb = Workbook(write_only=True)
+    for sheet, labels in ANNUAL_LABELS.items():
+        ws = wb.create_sheet(sheet)
+        for i in range(header_offset):
+            ws.append([f"{sheet} - Đơn vị: VND" if i == 0 else None])
+        ws.append(["Chỉ tiêu"] + [f"Năm/{y}" for y in years])
+        for label, item in labels:
+            ws.append([label] + [fmt_cell(int(round(annual[y][item])), rng) if rng.random() < 0.3
+                                 else int(round(annual[y][item])) for y in years])
+    wb.save(path)
+
+def generate_landing(root, n_companies: int = 20, years=(2023, 2024), seed: int = 0,
+                     workbooks: bool = True) -> pd.DataFrame:
+    """Write the synthetic tree under `root`; returns the expected bronze rows."""
+    rng = np.random.default_rng(seed)
+    root = Path(root)
+    landing = root / "data" / "landing"
+    comp = company_list(n_companies, rng)
+    root.mkdir(parents=True, exist_ok=True)
+    comp.to_csv(root / "company_list.csv", index=False)
+
+    quarters = simulate_quarters(comp, list(years), rng)
+    truth = []
+    for rec in quarters.to_dict("records"):
+        base = landing / rec["exchange"] / rec["company_id"] / str(rec["year"])
+        base.mkdir(parents=True, exist_ok=True)
+        truth.append({**{c: rec[c] for c in ID_COLS}, **write_quarter_files(base, rec, rng)})
+
+    if workbooks:
+        for (ex, sym), q in quarters.groupby(["exchange", "company_id"], sort=False):
+            annual = {y: annual_values(g) for y, g in q.groupby("year")}
+            for y in years:
+                write_workbook(landing / ex / sym / str(y) / f"{sym}_{y}.xlsx", [y], annual, rng)
+            write_workbook(landing / ex / sym / f"{sym}_{years[0]}_{years[-1]}.xlsx", list(years), annual, rng,
+                           header_offset=int(rng.integers(1, 5)))
+
+    truth = pd.DataFrame(truth, columns=ID_COLS + AMOUNT_COLS)
+    truth.to_csv(root / "truth_quarterly.csv", index=False)
+    n_files = len(quarters) * len(QUARTER_LABELS)
+    print(f"[OK] Synthetic landing: {landing}  companies={n_companies}  years={len(years)}  "
+          f"quarter files={n_files}")
+    return truth
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("root", help="output root; writes data/landing, company_list.csv, truth_quarterly.csv")
+    ap.add_argument("--companies", type=int, default=20)
+    ap.add_argument("--years", type=int, nargs="+", default=[2023, 2024])
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--no-workbooks", action="store_true", help="only the quarterly Q*_*.xlsx files")
+    args = ap.parse_args()
+    generate_landing(args.root, args.companies, args.years, args.seed, workbooks=not args.no_workbooks)
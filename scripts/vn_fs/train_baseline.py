@@ -1,48 +1,289 @@
 
 import os
+import json
+import time
+import argparse
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import GroupShuffleSplit
+from lake import read_dataset, dataset_exists
+from schemas import FEATURE_COLS, LABEL_COL, LABEL_INPUTS, enforce, memory_report
+from sklearn.model_selection import GroupShuffleSplit, GroupKFold, GridSearchCV, RandomizedSearchCV
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report
+from sklearn.metrics import classification_report, f1_score, precision_score, recall_score, roc_auc_score
+from model_artifacts import save_artifact, load_artifact
+from model_backends import BACKENDS, get_backend, warm_start_blocker
+from feature_cache import CACHE_DIR, files_digest, cache_key, load_entry, save_entry
+from run_report import RunReport, add_report_args
 
-SILVER_PATH = "../../lake/silver/vn_fs/silver_financials_quarterly.csv"
+SILVER_PATH = "../../lake/silver/vn_fs/financials_quarterly"
 SAMPLE_PATH = "../../lake/silver/vn_fs/silver_financials_quarterly_sample.csv"
+MODEL_DIR = "../../lake/models"
+# pushed down to the silver dataset, e.g. [("year", ">=", 2023), ("exchange", "==", "HOSE")]
+FILTERS = None
 
-if os.path.exists(SILVER_PATH):
-    df = pd.read_csv(SILVER_PATH)
-else:
-    print(f"[WARN] Silver not found. Using sample: {SAMPLE_PATH}")
-    if not os.path.exists(SAMPLE_PATH):
+features = FEATURE_COLS
+# recorded in the artifact so scores can be traced back to the labeling rule
+LABEL_RULE = ("credit_risk=1 if >=2 of: debt_to_equity>2.5, net_margin<-0.05, "
+              "interest_coverage<1.5, cashflow_ops<0 & current_ratio<1.0")
+
+def load_training_frame(silver_path: str = SILVER_PATH, sample_path: str = SAMPLE_PATH, filters=FILTERS):
+    if dataset_exists(silver_path):
+        columns = list(dict.fromkeys(["company_id", *features, LABEL_COL, *LABEL_INPUTS]))
+        return read_dataset(silver_path, columns=columns, filters=filters)
+    print(f"[WARN] Silver not found. Using sample: {sample_path}")
+    if not os.path.exists(sample_path):
         raise FileNotFoundError("No data available. Please run silver_transform.py or ensure the sample exists.")
-    df = pd.read_csv(SAMPLE_PATH)
-
-if "credit_risk" not in df.columns:
-    conds = (df.get("debt_to_equity",0) > 2.5).astype(int)
-    conds += (df.get("net_margin",0) < -0.05).astype(int)
-    conds += (df.get("interest_coverage",0) < 1.5).astype(int)
-    conds += ((df.get("cashflow_ops",0) < 0) & (df.get("current_ratio",0).fillna(0) < 1.0)).astype(int)
-    df["credit_risk"] = (conds >= 2).astype(int)
-
-features = [
-    "revenue","cogs","opex","net_profit","total_assets","equity",
-    "short_term_debt","long_term_debt","cashflow_ops",
-    "roe","roa","debt_to_equity","current_ratio","interest_coverage","net_margin"
-]
-for f in features:
-    if f not in df.columns:
-        df[f] = 0.0
-
-X = df[features].fillna(0.0)
-y = df["credit_risk"]
-groups = df["company_id"].astype(str)
-
-gss = GroupShuffleSplit(n_splits=1, test_size=0.2, random_state=42)
-train_idx, test_idx = next(gss.split(X, y, groups=groups))
-X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
-y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
-
-clf = RandomForestClassifier(n_estimators=300, random_state=42, class_weight="balanced")
-clf.fit(X_train, y_train)
-pred = clf.predict(X_test)
-
-print(classification_report(y_test, pred, digits=3))
+    return enforce(pd.read_csv(sample_path))
+
+def add_credit_risk(df: pd.DataFrame) -> pd.DataFrame:
+    if "credit_risk" not in df.columns:
+        conds = (df.get("debt_to_equity",0) > 2.5).astype(int)
+        conds += (df.get("net_margin",0) < -0.05).astype(int)
+        conds += (df.get("interest_coverage",0) < 1.5).astype(int)
+        conds += ((df.get("cashflow_ops",0) < 0) & (df.get("current_ratio",0).fillna(0) < 1.0)).astype(int)
+        df["credit_risk"] = (conds >= 2).astype(int)
+    return df
+
+def feature_matrix(df: pd.DataFrame, cols=features) -> pd.DataFrame:
+    """Model input: `cols` in order, missing columns and NaN as 0.0 (shared with scoring)."""
+    for f in cols:
+        if f not in df.columns:
+            df[f] = 0.0
+    return df[list(cols)].fillna(0.0)
+
+def build_xy(df: pd.DataFrame, mem_report: bool = False):
+    df = add_credit_risk(df)
+    if mem_report:
+        memory_report(df, "train input")
+    # float32 is what the forest splits on anyway; also the cached layout
+    X = feature_matrix(df).astype(np.float32)
+    y = df["credit_risk"]
+    groups = df["company_id"].astype(str)
+    return X, y, groups
+
+def holdout_split(X, y, groups):
+    gss = GroupShuffleSplit(n_splits=1, test_size=0.2, random_state=42)
+    return next(gss.split(X, y, groups=groups))
+
+def load_xy(use_cache: bool = True, cache_dir: str = CACHE_DIR, silver_path: str = SILVER_PATH,
+            sample_path: str = SAMPLE_PATH, filters=FILTERS, mem_report: bool = False):
+    """(X, y, groups, holdout split), memory-mapped from the cache when the
+    silver files, feature list and labeling rule are unchanged."""
+    if use_cache:
+        source = silver_path if dataset_exists(silver_path) else sample_path
+        key = cache_key(files_digest([source]) if os.path.exists(source) else None, features, LABEL_RULE,
+                        filters=filters, split="GroupShuffleSplit(test_size=0.2, random_state=42)")
+        hit = load_entry(key, cache_dir)
+        if hit is not None:
+            print(f"[OK] Training matrix from cache: {key}  rows={len(hit[0])}")
+            return hit
+    X, y, groups = build_xy(load_training_frame(silver_path, sample_path, filters), mem_report)
+    split = holdout_split(X, y, groups)
+    if use_cache:
+        save_entry(key, X, y, groups, split, cache_dir)
+    return X, y, groups, split
+
+def train_holdout(X, y, groups, split=None, report: RunReport = None, backend="rf", prev=None):
+    """Fit `backend` (name or object) on the train part; continue `prev` instead if given."""
+    report = report or RunReport("train")
+    backend = get_backend(backend) if isinstance(backend, str) else backend
+    train_idx, test_idx = split if split is not None else holdout_split(X, y, groups)
+    X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+    y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+
+    with report.stage("fit", rows=len(X_train)) as st:
+        clf = backend.update(prev, X_train, y_train) if prev is not None else backend.fit(X_train, y_train)
+        st.update(backend=backend.name, warm_start=prev is not None)
+    with report.stage("predict", rows=len(X_test)):
+        pred = clf.predict(X_test)
+
+    print(classification_report(y_test, pred, digits=3))
+    return clf, classification_report(y_test, pred, output_dict=True, zero_division=0)
+
+def backend_from_args(args):
+    return get_backend(args.backend, **({"n_jobs": args.n_jobs} if args.backend == "rf" else {}))
+
+def previous_model(backend, model_dir: str, y):
+    """(model, meta) of the backend's LATEST artifact if it can be warm-started on `y`, else (None, None)."""
+    try:
+        prev, meta = load_artifact(model_dir, name=backend.model_name)
+    except FileNotFoundError:
+        print(f"[WARN] No previous {backend.model_name} artifact: full fit")
+        return None, None
+    reason = warm_start_blocker(backend, prev, meta, features, LABEL_RULE, y)
+    if reason:
+        print(f"[WARN] Warm start skipped ({reason}): full fit")
+        return None, None
+    print(f"[OK] Warm start from {backend.model_name}/{meta['version']}")
+    return prev, meta
+
+def run_holdout(args, report: RunReport = None):
+    report = report or RunReport("train")
+    with report.stage("load_xy") as st:
+        X, y, groups, split = load_xy(not args.no_cache, args.cache_dir, args.silver, mem_report=args.mem_report)
+        st["rows"] = len(X)
+    backend = backend_from_args(args)
+    prev, prev_meta = previous_model(backend, args.model_dir, y) if args.warm_start else (None, None)
+    clf, metrics = train_holdout(X, y, groups, split, report=report, backend=backend, prev=prev)
+    with report.stage("save_artifact"):
+        art = save_artifact(clf, features, X, y, args.model_dir, name=backend.model_name, label_rule=LABEL_RULE,
+                            metrics={"holdout": metrics},
+                            extra={"split": "GroupShuffleSplit(test_size=0.2)", "backend": backend.name,
+                                   "warm_start_from": prev_meta["version"] if prev_meta else None})
+    print(f"[OK] Model artifact: {art}")
+
+# ==== Backend comparison on one grouped split ====
+
+def positive_scores(model, X) -> np.ndarray:
+    classes = list(model.classes_)
+    return model.predict_proba(X)[:, classes.index(1)] if 1 in classes else np.zeros(len(X))
+
+def compare_backends(X, y, groups, split=None, names=None, n_jobs: int = -1,
+                     report: RunReport = None) -> pd.DataFrame:
+    """Fit time, one warm-start update, predict time and holdout metrics per backend."""
+    report = report or RunReport("train")
+    train_idx, test_idx = split if split is not None else holdout_split(X, y, groups)
+    X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+    y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+    rows = []
+    for name in names or list(BACKENDS):
+        backend = get_backend(name, **({"n_jobs": n_jobs} if name == "rf" else {}))
+        with report.stage(f"fit_{name}", rows=len(X_train)):
+            t0 = time.perf_counter()
+            model = backend.fit(X_train, y_train)
+            fit_s = time.perf_counter() - t0
+        with report.stage(f"predict_{name}", rows=len(X_test)):
+            t0 = time.perf_counter()
+            score = positive_scores(model, X_test)
+            predict_s = time.perf_counter() - t0
+        pred = (score >= 0.5).astype(int)
+        with report.stage(f"update_{name}", rows=len(X_train)):
+            t0 = time.perf_counter()
+            backend.update(model, X_train, y_train)
+            update_s = time.perf_counter() - t0
+        rows.append({
+            "backend": name, "fit_s": round(fit_s, 3), "update_s": round(update_s, 3),
+            "predict_s": round(predict_s, 3),
+            "f1_macro": round(f1_score(y_test, pred, average="macro", zero_division=0), 4),
+            "precision_1": round(precision_score(y_test, pred, zero_division=0), 4),
+            "recall_1": round(recall_score(y_test, pred, zero_division=0), 4),
+            "roc_auc": round(roc_auc_score(y_test, score), 4) if y_test.nunique() > 1 else None,
+        })
+    return pd.DataFrame(rows)
+
+def run_compare(args, report: RunReport = None):
+    report = report or RunReport("train")
+    with report.stage("load_xy") as st:
+        X, y, groups, split = load_xy(not args.no_cache, args.cache_dir, args.silver, mem_report=args.mem_report)
+        st["rows"] = len(X)
+    table = compare_backends(X, y, groups, split, args.compare or None, args.n_jobs, report)
+    print(f"train={len(split[0])} test={len(split[1])} (GroupShuffleSplit by company_id, same split for all)")
+    print(table.to_string(index=False))
+    if args.compare_out:
+        table.to_csv(args.compare_out, index=False)
+        print(f"[OK] Backend comparison: {args.compare_out}")
+
+# ==== Grouped CV + hyperparameter search ====
+# Every (candidate, fold) fit is a separate joblib task spread over n_jobs
+# processes. X is handed over as one contiguous float32 array, which joblib
+# memory-maps into the workers instead of pickling a copy per task, and the
+# GroupKFold indices are computed once and reused by every candidate.
+
+DEFAULT_GRID = {
+    "n_estimators": [100, 300],
+    "max_depth": [None, 8, 16],
+    "min_samples_leaf": [1, 5],
+    "max_features": ["sqrt", 0.5],
+}
+
+def grouped_cv_search(X, y, groups, param_grid: dict = None, n_splits: int = 5, n_iter: int = None,
+                      n_jobs: int = -1, scoring: str = "f1_macro", random_state: int = 42):
+    """Return (best_model, ranked results table, effective n_splits) for a search grouped by company_id."""
+    n_groups = pd.Series(groups).nunique()
+    if n_groups < 2:
+        raise ValueError(f"Grouped CV needs at least 2 companies, got {n_groups}")
+    if n_splits > n_groups:
+        print(f"[WARN] n_splits={n_splits} > {n_groups} companies: using {n_groups} folds")
+        n_splits = n_groups
+    Xa = np.ascontiguousarray(X.to_numpy(dtype=np.float32))
+    ya = np.asarray(y)
+    folds = list(GroupKFold(n_splits=n_splits).split(Xa, ya, groups=groups))
+
+    # one tree-building thread per task: parallelism comes from the search itself
+    est = RandomForestClassifier(random_state=random_state, class_weight="balanced", n_jobs=1)
+    grid = param_grid or DEFAULT_GRID
+    common = dict(cv=folds, scoring=scoring, n_jobs=n_jobs, refit=True, pre_dispatch="2*n_jobs")
+    if n_iter:
+        search = RandomizedSearchCV(est, grid, n_iter=n_iter, random_state=random_state, **common)
+    else:
+        search = GridSearchCV(est, grid, **common)
+    search.fit(Xa, ya)
+
+    res = pd.DataFrame(search.cv_results_)
+    cols = ["rank_test_score", "mean_test_score", "std_test_score", "mean_fit_time"]
+    table = res[[*cols, *[c for c in res.columns if c.startswith("param_")]]]
+    table = table.rename(columns=lambda c: c.removeprefix("param_")).sort_values(["rank_test_score", "mean_fit_time"])
+    return search.best_estimator_, table.reset_index(drop=True), n_splits
+
+def run_cv(args, report: RunReport = None):
+    report = report or RunReport("train")
+    with report.stage("load_xy") as st:
+        X, y, groups, _ = load_xy(not args.no_cache, args.cache_dir, args.silver, mem_report=args.mem_report)
+        st["rows"] = len(X)
+    grid = json.loads(args.grid) if args.grid else None
+    with report.stage("cv_search", rows=len(X)) as st:
+        best, table, n_splits = grouped_cv_search(X, y, groups, param_grid=grid, n_splits=args.n_splits,
+                                        n_iter=args.n_iter, n_jobs=args.n_jobs, scoring=args.scoring)
+        st.update(candidates=len(table), n_splits=n_splits)
+    print(table.head(args.top).to_string(index=False))
+
+    top = table.iloc[0]
+    metrics = {"cv": {"scoring": args.scoring, "n_splits": n_splits,
+                      "mean_test_score": float(top["mean_test_score"]),
+                      "std_test_score": float(top["std_test_score"])}}
+    with report.stage("save_artifact"):
+        # same model name as holdout rf (scorers pick it up as LATEST); meta says it came from the search
+        search = {"method": "random" if args.n_iter else "grid", "n_iter": args.n_iter,
+                  "grid": grid or DEFAULT_GRID, "candidates": len(table)}
+        art = save_artifact(best, features, X, y, args.model_dir, name=get_backend("rf").model_name,
+                            label_rule=LABEL_RULE, metrics=metrics,
+                            extra={"split": f"GroupKFold({n_splits})", "backend": "rf", "search": search,
+                                   "warm_start_from": None})
+        results_csv = art / "cv_results.csv"
+        table.to_csv(results_csv, index=False)
+    print(f"[OK] CV results: {results_csv}  model artifact: {art}")
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cv", action="store_true", help="grouped k-fold CV + hyperparameter search")
+    ap.add_argument("--backend", default="rf", choices=sorted(BACKENDS), help="model backend for holdout training")
+    ap.add_argument("--warm-start", action="store_true",
+                    help="continue the backend's LATEST model on the current data instead of refitting")
+    ap.add_argument("--compare", nargs="*", default=None, metavar="BACKEND",
+                    help="compare backends (default all) on the same grouped split")
+    ap.add_argument("--compare-out", default=None, help="also write the comparison table as CSV")
+    ap.add_argument("--n-splits", type=int, default=5)
+    ap.add_argument("--n-iter", type=int, default=None, help="random search with this many candidates")
+    ap.add_argument("--n-jobs", type=int, default=-1)
+    ap.add_argument("--scoring", default="f1_macro")
+    ap.add_argument("--grid", default=None, help='JSON, e.g. \'{"n_estimators": [100, 300]}\'')
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--model-dir", default=MODEL_DIR)
+    ap.add_argument("--no-cache", action="store_true", help="rebuild X/y from silver, bypass the cache")
+    ap.add_argument("--silver", default=SILVER_PATH)
+    ap.add_argument("--cache-dir", default=CACHE_DIR)
+    ap.add_argument("--mem-report", action="store_true", help="print per-column memory use of the training frame")
+    add_report_args(ap)
+    return ap
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    report = RunReport("train", args.report, args.profile)
+    if args.compare is not None:
+        run_compare(args, report)
+    elif args.cv:
+        run_cv(args, report)
+    else:
+        run_holdout(args, report)
+    if args.report:
+        report.save()
@@ -0,0 +1,87 @@
+import os
+import sys
+import pandas as pd
+from pathlib import Path
+from pandas.io.parsers import TextParser
+sys.path.append(str(Path(__file__).resolve().parent / "vn_fs"))
+from sheet_cache import read_raw_sheets, sheet_names as cached_sheet_names
+
+# ==== Đọc workbook một lần, cache theo lượt chạy ====
+# Mỗi file chỉ mở 1 lần: mọi sheet cần dùng được đọc trong cùng một lần parse
+# (header=None), header được tìm và áp lên chính các dòng đã đọc.
+# Sheet thô lấy qua vn_fs/sheet_cache: lần đầu parse Excel rồi lưu Arrow theo
+# hash file, các lần chạy sau đọc memory-map, không mở lại openpyxl.
+
+SHEETS = ["CÂN ĐỐI KẾ TOÁN", "KẾT QUẢ KINH DOANH", "LƯU CHUYỂN TIỀN TỆ"]
+
+_RAW_CACHE = {}      # (path, mtime) -> {sheet_name: raw df}
+_SHEET_CACHE = {}    # (path, mtime, sheet_name, header) -> df
+
+
+def _file_key(file_path):
+    path = os.path.abspath(file_path)
+    return path, os.path.getmtime(path)
+
+
+def sheet_names(file_path):
+    return cached_sheet_names(file_path)
+
+
+def load_raw_sheets(file_path, sheet_names=None, prefetch=()):
+    """Đọc các sheet (header=None) trong một lần mở file; sheet_names=None là tất cả.
+
+    Các sheet trong `prefetch` có trong file cũng được đọc luôn để khỏi mở lại.
+    """
+    cached = _RAW_CACHE.setdefault(_file_key(file_path), {})
+    if sheet_names is not None and all(s in cached for s in sheet_names):
+        return {s: cached[s] for s in sheet_names}
+
+    available = cached_sheet_names(file_path)
+    names = available if sheet_names is None else list(sheet_names)
+    extra = [s for s in prefetch if s in available and s not in names]
+    cached.update(read_raw_sheets(file_path, [s for s in names + extra if s not in cached]))
+    return {s: cached[s] for s in names}
+
+
+def find_header_row(raw, pattern="Năm/20", max_rows=15):
+    head = raw.head(max_rows)
+    hits = head.apply(lambda col: col.astype(str).str.contains(pattern, case=False, na=False)).any(axis=1)
+    if not hits.any():
+        return None
+    return int(hits.to_numpy().argmax())
+
+
+def apply_header(raw, header_row):
+    """Tương đương pd.read_excel(..., header=header_row) nhưng dùng dòng đã đọc sẵn."""
+    if raw.empty:
+        return pd.DataFrame()
+    rows = raw.astype(object).where(raw.notna(), "").values.tolist()
+    return TextParser(rows, header=header_row).read()
+
+
+def read_sheet(file_path, sheet_name, header=0):
+    """header là số dòng, hoặc "auto" để tìm dòng có 'Năm/20xx'."""
+    key = (*_file_key(file_path), sheet_name, header)
+    if key in _SHEET_CACHE:
+        return _SHEET_CACHE[key]
+
+    raw = load_raw_sheets(file_path, [sheet_name], prefetch=SHEETS)[sheet_name]
+    header_row = header
+    if header == "auto":
+        header_row = find_header_row(raw)
+        if header_row is None:
+            raise ValueError(f"Không tìm thấy dòng header trong sheet {sheet_name}")
+
+    df = apply_header(raw, header_row)
+    _SHEET_CACHE[key] = df
+    return df
+
+
+def read_statements(file_path, header=0):
+    """Trả về (cdkt, kqkd, lctt) từ một lần đọc file."""
+    return tuple(read_sheet(file_path, s, header=header) for s in SHEETS)
+
+
+def clear_cache():
+    _RAW_CACHE.clear()
+    _SHEET_CACHE.clear()